@@ -3,6 +3,7 @@ YouTube Video Summarizer - Main Application
 """
 import os
 import sys
+from pathlib import Path
 import argparse
 from datetime import datetime
 from dotenv import load_dotenv
@@ -11,10 +12,13 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Add the project root to the path so we can import from src
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[1])
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from src.nodes.input_processing_node import InputProcessingNode
 from src.nodes.content_extraction_node import ContentExtractionNode
+from src.nodes.transcript_preprocess_node import TranscriptPreprocessNode
 from src.nodes.topic_extraction_node import TopicExtractionNode
 from src.nodes.rubric_recommendation_node import RubricRecommendationNode
 from src.nodes.rubric_selection_node import RubricSelectionNode
@@ -59,7 +63,7 @@ def run_pipeline(youtube_url, output_dir="output", enable_chunking=False, max_wo
     
     try:
         # 1. Input Processing Node
-        logger.info("[1/8] Starting Input Processing...")
+        logger.info("[1/10] Starting Input Processing...")
         input_node = InputProcessingNode(shared_memory)
         shared_memory = input_node.run()
         
@@ -71,7 +75,7 @@ def run_pipeline(youtube_url, output_dir="output", enable_chunking=False, max_wo
         logger.info(f"Successfully processed video: {shared_memory.get('metadata', {}).get('title', 'Unknown')}")
         
         # 2. Content Extraction Node
-        logger.info("[2/8] Starting Content Extraction...")
+        logger.info("[2/10] Starting Content Extraction...")
         content_node = ContentExtractionNode(shared_memory)
         shared_memory = content_node.run()
         
@@ -83,8 +87,18 @@ def run_pipeline(youtube_url, output_dir="output", enable_chunking=False, max_wo
         transcript_length = len(shared_memory.get('transcript', ''))
         logger.info(f"Successfully extracted transcript ({transcript_length} characters)")
         
-        # 3. Topic Extraction Node
-        logger.info("[3/8] Starting Topic Extraction...")
+        # 3. Transcript Preprocess Node
+        logger.info("[3/10] Starting Transcript Preprocessing...")
+        transcript_preprocess_node = TranscriptPreprocessNode(shared_memory)
+        shared_memory = transcript_preprocess_node.run()
+        
+        # Check for errors
+        if "error" in shared_memory:
+            logger.error(f"Transcript Preprocessing failed: {shared_memory['error']}")
+            return shared_memory
+        
+        # 4. Topic Extraction Node
+        logger.info("[4/10] Starting Topic Extraction...")
         topic_node = TopicExtractionNode(shared_memory, chunk_size=chunk_size, overlap=overlap)
         shared_memory = topic_node.run()
         
@@ -98,8 +112,8 @@ def run_pipeline(youtube_url, output_dir="output", enable_chunking=False, max_wo
         for i, topic in enumerate(topics):
             logger.info(f"  Topic {i+1}: {topic}")
         
-        # 4. Rubric Recommendation Node
-        logger.info("[4/8] Starting Rubric Recommendation...")
+        # 5. Rubric Recommendation Node
+        logger.info("[5/10] Starting Rubric Recommendation...")
         rubric_recommendation_node = RubricRecommendationNode(shared_memory)
         shared_memory = rubric_recommendation_node.run()
         
@@ -113,8 +127,8 @@ def run_pipeline(youtube_url, output_dir="output", enable_chunking=False, max_wo
         for i, rubric in enumerate(recommended_rubrics[:3]):  # Show top 3
             logger.info(f"  Recommendation {i+1}: {rubric['name']} (Confidence: {rubric['confidence']}%)")
         
-        # 5. Rubric Selection Node
-        logger.info("[5/8] Starting Rubric Selection...")
+        # 6. Rubric Selection Node
+        logger.info("[6/10] Starting Rubric Selection...")
         rubric_selection_node = RubricSelectionNode(shared_memory)
         shared_memory = rubric_selection_node.run()
         
@@ -128,8 +142,8 @@ def run_pipeline(youtube_url, output_dir="output", enable_chunking=False, max_wo
         logger.info(f"Selected rubric: {selected_rubric['name']}")
         logger.info(f"Selected audience level: {audience_level}")
         
-        # 6. Topic Processing Orchestrator Node
-        logger.info("[6/8] Starting Topic Processing...")
+        # 7. Topic Processing Orchestrator Node
+        logger.info("[7/10] Starting Topic Processing...")
         orchestrator_node = TopicOrchestratorNode(shared_memory, max_workers=max_workers, questions_per_topic=3, no_qa=no_qa, whole_qa=whole_qa)
         shared_memory = orchestrator_node.run()
         
@@ -145,8 +159,8 @@ def run_pipeline(youtube_url, output_dir="output", enable_chunking=False, max_wo
         logger.info(f"Successfully processed {len(topics)} topics")
         logger.info(f"Generated {total_qa_pairs} Q&A pairs and {len(transformed_content)} transformed content blocks")
         
-        # 7. Audience Wrapper Node
-        logger.info("[7/9] Starting Audience Wrapper Application...")
+        # 8. Audience Wrapper Node
+        logger.info("[8/10] Starting Audience Wrapper Application...")
         audience_wrapper_node = AudienceWrapperNode(shared_memory)
         shared_memory = audience_wrapper_node.run()
         
@@ -157,8 +171,8 @@ def run_pipeline(youtube_url, output_dir="output", enable_chunking=False, max_wo
         
         logger.info(f"Successfully applied {audience_level} audience wrapper to content")
         
-        # 8. Content Integration Node
-        logger.info("[8/9] Starting Content Integration...")
+        # 9. Content Integration Node
+        logger.info("[9/10] Starting Content Integration...")
         content_integration_node = ContentIntegrationNode(shared_memory)
         shared_memory = content_integration_node.run()
         
@@ -169,8 +183,8 @@ def run_pipeline(youtube_url, output_dir="output", enable_chunking=False, max_wo
         
         logger.info("Successfully integrated individual topic transformations into a cohesive document")
         
-        # 9. HTML Generation Node
-        logger.info("[9/9] Starting HTML Generation...")
+        # 10. HTML Generation Node
+        logger.info("[10/10] Starting HTML Generation...")
         # Create a timestamped filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         video_id = shared_memory.get("video_id", "unknown")
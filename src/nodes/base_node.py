@@ -2,10 +2,12 @@
 Base node class for YouTube Video Summarizer.
 """
 import sys
-import os
+from pathlib import Path
 
 # Add the project root to the path so we can import from src.utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[2])
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from abc import ABC, abstractmethod
 from src.utils.logger import logger
@@ -15,6 +17,9 @@ class BaseNode(ABC):
     Abstract base class for all nodes in the YouTube Video Summarizer.
     """
     
+    # Subclasses that declare their own __slots__ get instances without a __dict__
+    __slots__ = ("shared_memory", "node_name")
+    
     def __init__(self, shared_memory=None):
         """
         Initialize the node with shared memory.
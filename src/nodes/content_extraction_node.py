@@ -2,10 +2,12 @@
 Content Extraction Node for YouTube Video Summarizer.
 """
 import sys
-import os
+from pathlib import Path
 
 # Add the project root to the path so we can import from src.utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[2])
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from src.nodes.base_node import BaseNode
 from src.utils.extract_youtube_transcript import extract_youtube_transcript
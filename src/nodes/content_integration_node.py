@@ -3,11 +3,13 @@ Content Integration Node for YouTube Video Summarizer.
 Transforms individual topic outputs into a cohesive document.
 """
 import sys
-import os
+from pathlib import Path
 from typing import Dict, List, Any
 
 # Add the project root to the path so we can import from src.utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[2])
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from src.nodes.base_node import BaseNode
 from src.utils.integrate_content import integrate_content
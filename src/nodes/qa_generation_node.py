@@ -2,12 +2,14 @@
 Q&A Generation Node for YouTube Video Summarizer.
 """
 import sys
-import os
+from pathlib import Path
 import textwrap
 import json
 
 # Add the project root to the path so we can import from src.utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[2])
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from src.nodes.base_node import BaseNode
 from src.utils.call_llm import call_llm
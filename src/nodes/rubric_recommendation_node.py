@@ -4,10 +4,12 @@ Rubric Recommendation Node for YouTube Video Summarizer.
 This node analyzes content and suggests appropriate transformation rubrics.
 """
 import sys
-import os
+from pathlib import Path
 
 # Add the project root to the path so we can import from src.utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[2])
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from src.nodes.base_node import BaseNode
 from src.utils.recommend_rubric import recommend_rubric
@@ -3,16 +3,19 @@ Topic Processing Orchestrator Node for YouTube Video Summarizer.
 Implements a Map-Reduce approach for parallel topic processing.
 """
 import sys
-import os
+from pathlib import Path
 from typing import List, Dict, Any
-import concurrent.futures
 
 # Add the project root to the path so we can import from src.utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[2])
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from src.nodes.base_node import BaseNode
 from src.nodes.topic_processor_node import TopicProcessorNode
 from src.utils.generate_qa import generate_whole_content_qa
+from src.utils.apply_rubric import apply_rubric_session, submit_transform_requests
+from src.utils.topic_windowing import build_topic_windows
 from src.utils.logger import logger
 
 class TopicOrchestratorNode(BaseNode):
@@ -21,26 +24,31 @@ class TopicOrchestratorNode(BaseNode):
     Maps topics to individual processors and reduces the results.
     """
     
-    def __init__(self, shared_memory=None, max_workers=3, questions_per_topic=3, no_qa=False, whole_qa=False):
+    def __init__(self, shared_memory=None, max_workers=3, questions_per_topic=3, no_qa=False, whole_qa=False,
+                 use_rubric_session=False):
         """
         Initialize the node with shared memory.
         
         Args:
             shared_memory (dict): Shared memory dictionary
-            max_workers (int): Maximum number of parallel workers for topic processing
+            max_workers (int): Maximum number of concurrent LLM requests for topic processing
             questions_per_topic (int): Number of questions to generate per topic
             no_qa (bool): Whether to disable Q&A generation entirely
             whole_qa (bool): Whether to generate comprehensive Q&A for the entire content
+            use_rubric_session (bool): Whether to transform all topics in one multi-turn
+                conversation that shares the transcript, instead of independent requests
         """
         super().__init__(shared_memory)
         self.max_workers = max_workers
         self.questions_per_topic = questions_per_topic
         self.no_qa = no_qa
         self.whole_qa = whole_qa
+        self.use_rubric_session = use_rubric_session
         self.topics = []
         self.transcript = ""
         self.selected_rubric = None
         self.topic_results = {}
+        self.topic_windows = {}
         logger.debug(f"TopicOrchestratorNode initialized with max_workers={max_workers}, questions_per_topic={questions_per_topic}, no_qa={no_qa}, whole_qa={whole_qa}")
     
     def prep(self):
@@ -73,6 +81,11 @@ class TopicOrchestratorNode(BaseNode):
         self.transcript = self.shared_memory["transcript"]
         self.selected_rubric = self.shared_memory["selected_rubric"]
         
+        # Select the transcript window relevant to each topic once for all processors
+        self.topic_windows = build_topic_windows(
+            self.transcript, self.topics, excerpt=self.shared_memory.get("transcript_excerpt")
+        )
+        
         topics_count = len(self.topics)
         # Adjust max_workers if there are fewer topics than workers
         self.max_workers = min(self.max_workers, topics_count)
@@ -97,34 +110,61 @@ class TopicOrchestratorNode(BaseNode):
         transformed_content = {}
         
         try:
-            # MAP phase: Process each topic in parallel
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                # Create a future for each topic
-                future_to_topic = {
-                    executor.submit(
-                        self._process_topic, 
-                        topic, 
-                        self.transcript, 
-                        self.selected_rubric,
-                        self.questions_per_topic,
-                        True  # Force no_qa to True for individual topics
-                    ): topic for topic in self.topics
-                }
+            # MAP phase: Build every topic's LLM request, then send them all as one bulk
+            # submission with bounded concurrency instead of one blocking call per worker thread
+            processors = {}
+            for topic in self.topics:
+                processor = self._create_topic_processor(
+                    topic,
+                    self.transcript,
+                    self.selected_rubric,
+                    self.questions_per_topic,
+                    True  # Force no_qa to True for individual topics
+                )
+                processor.prep()
+                if "error" in processor.shared_memory:
+                    error_msg = f"Error processing topic '{topic}': {processor.shared_memory['error']}"
+                    logger.error(error_msg)
+                    self.shared_memory["error"] = error_msg
+                    return
+                processors[topic] = processor
+            
+            responses = {}
+            if self.use_rubric_session:
+                # One conversation per transcript/rubric; processors take turns in it
+                session = apply_rubric_session(
+                    self.transcript,
+                    self.selected_rubric.get("rubric_id", "insightful_conversational"),
+                    self.selected_rubric.get("knowledge_level")
+                )
+                for processor in processors.values():
+                    processor.shared_memory["rubric_session"] = session
+            else:
+                # Topics whose transcript is too short need no request
+                requests = {}
+                for topic, processor in processors.items():
+                    request = processor.build_llm_request()
+                    if request is not None:
+                        requests[topic] = request
+                responses = submit_transform_requests(requests, concurrency=self.max_workers)
+            
+            # Hand each response back to its already prepared processor to finish the topic
+            for topic, processor in processors.items():
+                result_memory = processor.run_prepared(responses.get(topic))
+                if "error" in result_memory:
+                    error_msg = f"Error processing topic '{topic}': {result_memory['error']}"
+                    logger.error(error_msg)
+                    self.shared_memory["error"] = error_msg
+                    return
                 
-                # Process the results as they complete
-                for future in concurrent.futures.as_completed(future_to_topic):
-                    topic = future_to_topic[future]
-                    try:
-                        result = future.result()
-                        # Store the results
-                        self.topic_results[topic] = result
-                        transformed_content[topic] = result["transformed_content"]
-                        # We're not collecting individual topic Q&A pairs anymore
-                    except Exception as e:
-                        error_msg = f"Error processing topic '{topic}': {str(e)}"
-                        logger.exception(error_msg)
-                        self.shared_memory["error"] = error_msg
-                        return
+                # Store the results
+                result = {
+                    "qa_pairs": result_memory.get("qa_pairs", []),
+                    "transformed_content": processor.get_transformed_content()
+                }
+                self.topic_results[topic] = result
+                transformed_content[topic] = result["transformed_content"]
+                # We're not collecting individual topic Q&A pairs anymore
             
             # REDUCE phase: Combine the results
             logger.info("All topics processed, combining results")
@@ -176,9 +216,9 @@ class TopicOrchestratorNode(BaseNode):
             logger.exception(error_msg)
             self.shared_memory["error"] = error_msg
     
-    def _process_topic(self, topic, transcript, selected_rubric, questions_per_topic, no_qa):
+    def _create_topic_processor(self, topic, transcript, selected_rubric, questions_per_topic, no_qa):
         """
-        Process a single topic using a TopicProcessorNode.
+        Create a TopicProcessorNode for a single topic.
         
         Args:
             topic (str): The topic to process
@@ -188,7 +228,7 @@ class TopicOrchestratorNode(BaseNode):
             no_qa (bool): Whether to disable Q&A generation
             
         Returns:
-            dict: The processed results for the topic
+            TopicProcessorNode: The processor for the topic
         """
         logger.debug(f"Processing topic: {topic}")
         
@@ -200,15 +240,14 @@ class TopicOrchestratorNode(BaseNode):
             "questions_per_topic": questions_per_topic,
             "no_qa": no_qa
         }
+        if topic in self.topic_windows:
+            topic_shared_memory["transcript_window"] = self.topic_windows[topic]
         
-        # Create and run a TopicProcessorNode for this topic
-        processor = TopicProcessorNode(topic_shared_memory)
-        result_memory = processor.run()
+        # Share the transcript excerpt computed once per pipeline run
+        if "transcript_excerpt" in self.shared_memory:
+            topic_shared_memory["transcript_excerpt"] = self.shared_memory["transcript_excerpt"]
         
-        return {
-            "qa_pairs": result_memory.get("qa_pairs", []),
-            "transformed_content": result_memory.get("transformed_content", "")
-        }
+        return TopicProcessorNode(topic_shared_memory)
     
     def post(self):
         """
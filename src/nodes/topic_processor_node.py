@@ -3,24 +3,34 @@ Topic Processor Node for YouTube Video Summarizer.
 Processes a single topic with Q&A generation and rubric transformation.
 """
 import sys
-import os
+from pathlib import Path
 import json
 
 # Add the project root to the path so we can import from src.utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[2])
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from src.nodes.base_node import BaseNode
 from src.utils.generate_qa import generate_qa_pairs
-from src.utils.apply_rubric import apply_rubric
+from src.utils.apply_rubric import apply_rubric_stream, build_transcript_transform_request, get_transcript_excerpt, resolve_rubric_settings
 from src.utils.logger import logger
 
+# Transcripts shorter than this (after stripping whitespace) are not worth an LLM call
+MIN_TRANSCRIPT_CHARS = 200
+
 class TopicProcessorNode(BaseNode):
     """
     Node for processing a single topic, including Q&A generation and content transformation.
     This node is designed to be used as part of a Map-Reduce pattern.
     """
     
-    def __init__(self, shared_memory=None):
+    # Many processors are created per run; topic state lives in shared memory (see the
+    # properties below), so only the values resolved in prep() need instance storage
+    __slots__ = ("_rubric_id", "_rubric_name", "_knowledge_level", "_is_trivial")
+    
+    def __init__(self, shared_memory=None, *, topic=None, transcript=None, selected_rubric=None,
+                 questions_per_topic=None, no_qa=None, knowledge_level=None):
         """
         Initialize the node with shared memory.
         
@@ -32,15 +42,70 @@ class TopicProcessorNode(BaseNode):
                 - questions_per_topic: Number of questions to generate per topic
                 - no_qa (optional): Whether to disable Q&A generation
                 - knowledge_level (optional): The knowledge level for the topic
+                - transcript_excerpt (optional): Precomputed transcript excerpt shared across topics
+                - transcript_window (optional): Transcript segments relevant to this topic
+                - llm_response (optional): Transformation response already fetched by the orchestrator
+                - rubric_session (optional): RubricSession shared by all topics of the transcript
+            topic, transcript, selected_rubric, questions_per_topic, no_qa, knowledge_level:
+                Optional keyword overrides; any value given is written into shared memory
         """
         super().__init__(shared_memory or {})
-        self.topic = self.shared_memory.get("topic")
-        self.transcript = self.shared_memory.get("transcript")
-        self.selected_rubric = self.shared_memory.get("selected_rubric")
-        self.questions_per_topic = self.shared_memory.get("questions_per_topic", 3)
-        self.no_qa = self.shared_memory.get("no_qa", False)
-        self.knowledge_level = self.shared_memory.get("knowledge_level")
-        logger.debug(f"TopicProcessorNode initialized for topic: {self.topic}")
+        overrides = {
+            "topic": topic,
+            "transcript": transcript,
+            "selected_rubric": selected_rubric,
+            "questions_per_topic": questions_per_topic,
+            "no_qa": no_qa,
+            "knowledge_level": knowledge_level
+        }
+        for key, value in overrides.items():
+            if value is not None:
+                self.shared_memory[key] = value
+        
+        # Rubric-derived values, resolved once in prep()
+        self._rubric_id = None
+        self._rubric_name = None
+        self._knowledge_level = None
+        self._is_trivial = False
+        logger.opt(lazy=True).debug("TopicProcessorNode initialized for topic: {}", lambda: self.topic)
+    
+    # Topic state is read straight from shared memory rather than copied onto the node,
+    # so processors sharing a transcript do not each hold their own references to it
+    @property
+    def topic(self):
+        return self.shared_memory.get("topic")
+    
+    @property
+    def transcript(self):
+        return self.shared_memory.get("transcript")
+    
+    @property
+    def selected_rubric(self):
+        return self.shared_memory.get("selected_rubric")
+    
+    @property
+    def questions_per_topic(self):
+        return self.shared_memory.get("questions_per_topic", 3)
+    
+    @property
+    def no_qa(self):
+        return self.shared_memory.get("no_qa", False)
+    
+    @property
+    def knowledge_level(self):
+        return self.shared_memory.get("knowledge_level")
+    
+    @property
+    def transcript_excerpt(self):
+        return self.shared_memory.get("transcript_excerpt")
+    
+    @property
+    def transcript_window(self):
+        return self.shared_memory.get("transcript_window")
+    
+    @property
+    def rubric_session(self):
+        return self.shared_memory.get("rubric_session")
     
     def prep(self):
         """
@@ -64,9 +129,19 @@ class TopicProcessorNode(BaseNode):
             self.shared_memory["error"] = error_msg
             return
         
+        # Resolve the rubric-derived values used throughout exec
+        self._rubric_id = self.selected_rubric.get("rubric_id", "insightful_conversational")
+        self._rubric_name = self.selected_rubric.get("name", "Unknown")
+        # Knowledge level from the selected rubric takes precedence over the topic's own
+        self._knowledge_level = self.selected_rubric.get("knowledge_level", self.knowledge_level)
+        self._is_trivial = len(self.transcript.strip()) < MIN_TRANSCRIPT_CHARS
+        if self._is_trivial:
+            logger.warning(f"Transcript is too short to process topic: {self.topic}")
+        
         logger.info(f"Preparing to process topic: {self.topic}")
-        logger.debug(f"Selected rubric: {self.selected_rubric['name']}")
-        logger.debug(f"Q&A generation: {'Disabled' if self.no_qa else 'Enabled'}")
+        # Lazy logging: the arguments are only evaluated when DEBUG output is enabled
+        logger.opt(lazy=True).debug("Selected rubric: {}", lambda: self._rubric_name)
+        logger.opt(lazy=True).debug("Q&A generation: {}", lambda: 'Disabled' if self.no_qa else 'Enabled')
     
     def exec(self):
         """
@@ -80,13 +155,13 @@ class TopicProcessorNode(BaseNode):
             # Skip Q&A generation for individual topics
             qa_pairs = []
             
-            # Apply the selected rubric
-            transformed_content = self._apply_rubric_transformation()
-            logger.info(f"Applied rubric '{self.selected_rubric['name']}' to topic: {self.topic}")
-            
-            # Store the results
+            # Apply the selected rubric, storing the transformed content as a list of
+            # fragments as they arrive; it is only joined once when it is read back.
+            # A stream that fails part-way raises here, so the error is recorded below
             self.shared_memory["qa_pairs"] = qa_pairs
-            self.shared_memory["transformed_content"] = transformed_content
+            self.shared_memory["transformed_content"] = fragments = []
+            fragments.extend(self._apply_rubric_transformation())
+            logger.info(f"Applied rubric '{self._rubric_name}' to topic: {self.topic}")
             
         except Exception as e:
             error_msg = f"Error processing topic '{self.topic}': {str(e)}"
@@ -100,6 +175,9 @@ class TopicProcessorNode(BaseNode):
         Returns:
             list: List of Q&A pairs
         """
+        if self._is_trivial:
+            return []
+        
         logger.info(f"Generating {self.questions_per_topic} Q&A pairs for topic: {self.topic}")
         
         try:
@@ -116,43 +194,91 @@ class TopicProcessorNode(BaseNode):
         Apply the selected rubric transformation to the topic.
         
         Returns:
-            str: The transformed content
+            Iterable[str]: Fragments of the transformed content; when the LLM is called
+                directly they are streamed as the response is generated, and iterating
+                raises LLMError if the call fails
         """
-        try:
-            logger.debug(f"Applying rubric '{self.selected_rubric['name']}' to topic: {self.topic}")
-            
-            # Format content dictionary as expected by apply_rubric
-            # No need for Q&A pairs since we're not generating them for individual topics
-            content = {
-                "topics": [self.topic],
-                "transcript": self.transcript
-            }
-            
-            # Get knowledge level from the selected rubric if available
-            knowledge_level = None
-            if self.selected_rubric and 'knowledge_level' in self.selected_rubric:
-                knowledge_level = self.selected_rubric['knowledge_level']
-            elif self.knowledge_level is not None:
-                knowledge_level = self.knowledge_level
-            
-            # Log the knowledge level being used
-            logger.debug(f"Using knowledge level: {knowledge_level if knowledge_level is not None else 'default'}")
-            
-            # Call the apply_rubric utility with correct parameters
-            transformed = apply_rubric(
-                content=content,
-                rubric_type=self.selected_rubric.get("rubric_id", "insightful_conversational"),
-                knowledge_level=knowledge_level
-            )
-            
-            # Extract the transformed content for this topic
-            if transformed and "transformed_content" in transformed:
-                return transformed["transformed_content"].get(self.topic, f"Error: No transformed content for {self.topic}")
-            return f"Error: Failed to transform content for {self.topic}"
+        # Skip the LLM call entirely when there is no meaningful transcript content
+        if self._is_trivial:
+            return [f"Insufficient content for {self.topic}"]
+        
+        # Use the response dispatched by the orchestrator's bulk request when available
+        if "llm_response" in self.shared_memory:
+            return [self.shared_memory["llm_response"]]
+        
+        # Continue the shared conversation when the orchestrator runs a rubric session
+        if self.rubric_session is not None:
+            return [self.rubric_session.transform(self.topic)]
+        
+        logger.opt(lazy=True).debug("Applying rubric '{}' to topic: {}", lambda: self._rubric_name, lambda: self.topic)
+        
+        # Log the knowledge level being used
+        logger.opt(lazy=True).debug("Using knowledge level: {}", lambda: self._knowledge_level if self._knowledge_level is not None else 'default')
+        
+        # Nothing is sent until the generator is consumed, so failures surface in exec()
+        return apply_rubric_stream(
+            topic=self.topic,
+            transcript=self._prompt_transcript(),
+            rubric_type=self._rubric_id,
+            knowledge_level=self._knowledge_level
+        )
+    
+    def run_prepared(self, llm_response=None):
+        """
+        Run exec and post for a processor whose prep() has already been called, so a caller
+        that needed the prepared state (e.g. to build the LLM request) does not repeat prep().
+        
+        Args:
+            llm_response (str, optional): The transformation response, already fetched by the caller
             
+        Returns:
+            dict: The updated shared memory
+        """
+        if llm_response is not None:
+            self.shared_memory["llm_response"] = llm_response
+        try:
+            if "error" not in self.shared_memory:
+                self.exec()
+            if "error" not in self.shared_memory:
+                self.post()
         except Exception as e:
-            logger.exception(f"Error applying rubric to topic {self.topic}: {str(e)}")
-            return f"Error transforming content for {self.topic}: {str(e)}"
+            logger.exception(f"Unexpected error in {self.node_name}: {str(e)}")
+            self.shared_memory["error"] = f"{self.node_name} error: {str(e)}"
+        return self.shared_memory
+    
+    def build_llm_request(self):
+        """
+        Build the LLM request for this topic's rubric transformation without sending it.
+        Must be called after prep().
+        
+        Returns:
+            dict: The request, as accepted by submit_transform_requests, or None if the
+                transcript is too short to need one
+        """
+        if self._is_trivial:
+            return None
+        
+        rubric_type, knowledge_level = resolve_rubric_settings(self._rubric_id, self._knowledge_level)
+        return build_transcript_transform_request(self.topic, self._prompt_transcript(), rubric_type, knowledge_level)
+    
+    def _prompt_transcript(self):
+        """
+        Get the transcript text for the transformation prompt.
+        
+        Returns:
+            str: The topic-relevant window, else the shared transcript excerpt; the excerpt is
+                only computed here when the processor runs without the orchestrator
+        """
+        return self.transcript_window or self.transcript_excerpt or get_transcript_excerpt(self.transcript)
+    
+    def get_transformed_content(self):
+        """
+        Get the transformed content for the topic.
+        
+        Returns:
+            str: The transformed content fragments joined into a single string
+        """
+        return "".join(self.shared_memory.get("transformed_content", []))
     
     def post(self):
         """
@@ -162,7 +288,7 @@ class TopicProcessorNode(BaseNode):
             logger.error(f"Error in Topic Processor Node: {self.shared_memory['error']}")
             return
         
-        transformed_content_length = len(self.shared_memory.get("transformed_content", ""))
+        transformed_content_length = len(self.get_transformed_content())
         
         logger.info(f"Topic Processor completed for: {self.topic}")
         logger.info(f"Transformed content length: {transformed_content_length} characters")
@@ -214,6 +340,6 @@ if __name__ == "__main__":
         for i, qa in enumerate(shared_memory['qa_pairs']):
             print(f"  Q{i+1}: {qa.get('question', '')}")
             print(f"  A{i+1}: {qa.get('answer', '')[:100]}...")
-        print(f"Transformed Content: {shared_memory['transformed_content'][:200]}...")
+        print(f"Transformed Content: {node.get_transformed_content()[:200]}...")
     else:
         print(f"Error: {shared_memory['error']}")
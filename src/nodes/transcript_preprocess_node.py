@@ -0,0 +1,92 @@
+"""
+Transcript Preprocessing Node for YouTube Video Summarizer.
+Computes transcript-derived artifacts once per pipeline run so topic processors can share them.
+"""
+import sys
+from pathlib import Path
+
+# Add the project root to the path so we can import from src.utils
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[2])
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
+
+from src.nodes.base_node import BaseNode
+from src.utils.apply_rubric import get_transcript_excerpt
+from src.utils.logger import logger
+
+class TranscriptPreprocessNode(BaseNode):
+    """
+    Node for preprocessing the transcript before per-topic processing.
+    
+    This node:
+    1. Reads the transcript from shared memory
+    2. Computes the excerpt used in transformation prompts
+    3. Writes transcript_excerpt to shared memory
+    """
+    
+    def __init__(self, shared_memory=None):
+        """
+        Initialize the node with shared memory.
+        
+        Args:
+            shared_memory (dict): Shared memory dictionary
+        """
+        super().__init__(shared_memory)
+        self.transcript = ""
+        self.transcript_excerpt = None
+    
+    def prep(self):
+        """
+        Prepare for execution by checking if the transcript exists in shared memory.
+        """
+        if "transcript" not in self.shared_memory:
+            error_msg = "Transcript not found in shared memory"
+            logger.error(error_msg)
+            self.shared_memory["error"] = error_msg
+            return
+        
+        if "error" in self.shared_memory:
+            logger.warning(f"Skipping Transcript Preprocessing due to previous error: {self.shared_memory['error']}")
+            return
+        
+        self.transcript = self.shared_memory["transcript"]
+        logger.debug(f"Preprocessing transcript ({len(self.transcript)} characters)")
+    
+    def exec(self):
+        """
+        Execute transcript preprocessing.
+        """
+        if "error" in self.shared_memory:
+            return
+        
+        self.transcript_excerpt = get_transcript_excerpt(self.transcript)
+        logger.debug(f"Transcript excerpt: {len(self.transcript_excerpt)} characters")
+    
+    def post(self):
+        """
+        Write the preprocessed transcript artifacts to shared memory.
+        """
+        if "error" in self.shared_memory:
+            logger.error(f"Error in Transcript Preprocess Node: {self.shared_memory['error']}")
+            return
+        
+        self.shared_memory["transcript_excerpt"] = self.transcript_excerpt
+        
+        logger.info("Transcript Preprocess Node completed successfully")
+
+
+if __name__ == "__main__":
+    # Test with a sample transcript
+    shared_memory = {
+        "transcript": "Machine learning is a subset of artificial intelligence that focuses on building systems that learn from data."
+    }
+    
+    # Create and run the node
+    node = TranscriptPreprocessNode(shared_memory)
+    updated_memory = node.run()
+    
+    # Print the results if no error
+    if "error" not in updated_memory:
+        print(f"Transcript excerpt: {updated_memory['transcript_excerpt'][:200]}")
+    else:
+        print(f"Error: {updated_memory['error']}")
@@ -9,7 +9,7 @@ produced by the rubric transformation.
 import json
 from enum import Enum
 from typing import Dict, Any
-from .call_llm import call_llm
+from .call_llm import call_llm, call_llm_many
 from src.utils.logger import logger
 
 class AudienceLevel(Enum):
@@ -18,6 +18,31 @@ class AudienceLevel(Enum):
     GENERAL = "general"
     CHILD = "child"
 
+# Maximum number of audience adjustment requests in flight at once
+AUDIENCE_CONCURRENCY = 8
+
+# Editor instructions shared by every audience adjustment request
+EDITOR_SYSTEM_PROMPT = """You are an expert content editor. Given a topic and its transformed content from a video,
+make SUBTLE adjustments to ensure it's appropriate for the specified audience level.
+
+IMPORTANT: This is NOT a full rewrite. The goal is to preserve 90-95% of the original 
+content, making only minor adjustments at the edges for audience appropriateness.
+"""
+
+# Fixed parts of the adjustment prompts; only the audience guidance, topic and content vary
+_SYSTEM_PROMPT_HEAD = f"""
+{EDITOR_SYSTEM_PROMPT}
+Adjustment Instructions:
+"""
+_SYSTEM_PROMPT_TAIL = """
+
+Make only minimal necessary adjustments while maintaining accuracy and the key points.
+Preserve the original content, structure, and style as much as possible.
+"""
+_PROMPT_HEAD = "\nTopic: "
+_PROMPT_CONTENT_SEP = "\n\nContent:\n"
+_PROMPT_TAIL = "\n"
+
 # Audience level characteristics to guide the LLM
 AUDIENCE_CHARACTERISTICS = {
     AudienceLevel.SOPHISTICATED.value: {
@@ -59,6 +84,10 @@ Make subtle adjustments for a younger audience by:
     }
 }
 
+# Precomputed at import so validation and prompt lookup do not rebuild anything per call
+_VALID_LEVELS = frozenset(a.value for a in AudienceLevel)
+_PROMPT_FOR = {a.value: AUDIENCE_CHARACTERISTICS[a.value]["prompt"] for a in AudienceLevel}
+
 def apply_audience_wrapper(transformed_content: Dict[str, str], audience_level: str) -> Dict[str, str]:
     """
     Apply subtle audience sophistication adjustments to transformed content.
@@ -77,21 +106,48 @@ def apply_audience_wrapper(transformed_content: Dict[str, str], audience_level:
     logger.info(f"Applying subtle {audience_level} audience adjustments to content")
     
     # Validate that audience_level is valid
-    if audience_level not in [a.value for a in AudienceLevel]:
+    if audience_level not in _VALID_LEVELS:
         logger.error(f"Invalid audience level: {audience_level}")
         audience_level = AudienceLevel.SOPHISTICATED.value
         logger.info(f"Falling back to default audience level: {audience_level}")
     
-    audience_prompt = AUDIENCE_CHARACTERISTICS[audience_level]["prompt"]
+    audience_prompt = _PROMPT_FOR[audience_level]
     adjusted_content = {}
     
-    # Apply subtle audience adjustments to each topic's transformed content
-    for topic, content in transformed_content.items():
-        adjusted_content[topic] = adjust_topic_for_audience(topic, content, audience_prompt)
+    # Send the adjustments for all topics concurrently rather than one blocking call per topic
+    requests = [build_audience_request(topic, content, audience_prompt) for topic, content in transformed_content.items()]
+    responses = call_llm_many(requests, concurrency=AUDIENCE_CONCURRENCY)
+    
+    for (topic, content), adjusted in zip(transformed_content.items(), responses):
+        if not adjusted or adjusted.startswith("Error"):
+            # Keep the original content if adjustment fails or comes back empty
+            logger.error(f"Error making audience adjustments for topic {topic}: {adjusted or 'empty response'}")
+            adjusted_content[topic] = content
+        else:
+            adjusted_content[topic] = adjusted
     
     logger.info(f"Successfully applied subtle adjustments to {len(adjusted_content)} topics for {audience_level} audience level")
     return adjusted_content
 
+def build_audience_request(topic: str, content: str, audience_prompt: str) -> Dict[str, str]:
+    """
+    Build the LLM request that adjusts a topic's content for the target audience level.
+    
+    Args:
+        topic (str): The topic being adjusted
+        content (str): The transformed content for the topic
+        audience_prompt (str): The prompt guiding audience adjustment
+        
+    Returns:
+        Dict[str, str]: The request, as accepted by call_llm_many
+    """
+    # The editor instructions and audience guidance are the same for every topic in a run,
+    # so they go in the system message where the provider can reuse the cached prefix
+    system_prompt = "".join((_SYSTEM_PROMPT_HEAD, audience_prompt, _SYSTEM_PROMPT_TAIL))
+    prompt = "".join((_PROMPT_HEAD, topic, _PROMPT_CONTENT_SEP, content, _PROMPT_TAIL))
+    
+    return {"system_prompt": system_prompt, "prompt": prompt}
+
 def adjust_topic_for_audience(topic: str, content: str, audience_prompt: str) -> str:
     """
     Make subtle adjustments to a topic's content for the target audience level.
@@ -104,29 +160,14 @@ def adjust_topic_for_audience(topic: str, content: str, audience_prompt: str) ->
     Returns:
         str: The content with subtle adjustments for the target audience
     """
-    # Prepare the prompt for the LLM
-    prompt = f"""
-You are an expert content editor. Given a topic and its transformed content from a video,
-make SUBTLE adjustments to ensure it's appropriate for the specified audience level.
-
-IMPORTANT: This is NOT a full rewrite. The goal is to preserve 90-95% of the original 
-content, making only minor adjustments at the edges for audience appropriateness.
-
-Topic: {topic}
-
-Content:
-{content}
-
-Adjustment Instructions:
-{audience_prompt}
-
-Make only minimal necessary adjustments while maintaining accuracy and the key points.
-Preserve the original content, structure, and style as much as possible.
-"""
+    request = build_audience_request(topic, content, audience_prompt)
     
     try:
         # Call the LLM to make subtle adjustments
-        adjusted = call_llm(prompt)
+        adjusted = call_llm(request["prompt"], system_prompt=request["system_prompt"])
+        if not adjusted:
+            logger.error(f"Empty audience adjustment for topic {topic}, keeping the original content")
+            return content
         logger.debug(f"Successfully made subtle adjustments for audience level: {topic}")
         return adjusted
         
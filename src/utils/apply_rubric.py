@@ -5,10 +5,16 @@ This module takes content and applies a transformation according to the
 specified rubric type, structuring and formatting the information appropriately.
 """
 
+import re
 import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from typing import Dict, List, Any
-from .call_llm import call_llm
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple, Iterator, AsyncIterator
+from .call_llm import call_llm, call_llm_stream, call_llm_many, iter_submit_many, close_async_client, get_encoding, get_cached_response, cache_response, CHARS_PER_TOKEN_ESTIMATE
+from src.utils import llm_cache
+from src.utils import json_utils
 from src.utils.logger import logger
 
 class RubricType(Enum):
@@ -41,6 +47,35 @@ DEFAULT_KNOWLEDGE_LEVELS = {
     RubricType.ELI5.value: 5
 }
 
+# Token budget for the transcript text in transcript-based transformation prompts, shared by
+# the leading excerpt and the topic windows (see topic_windowing). Without tiktoken, tokens
+# are estimated from the text length, as count_tokens does
+TRANSCRIPT_EXCERPT_TOKENS = 500
+
+# Size of the transcript sent once at the start of a rubric session; every topic of the
+# session reads from it, so it is far larger than a single topic's excerpt while staying
+# well within the model's context window
+SESSION_TRANSCRIPT_TOKENS = 60000
+
+# Marks the places where transcript text was left out of an excerpt or topic window
+TRANSCRIPT_GAP_MARKER = "[...]"
+
+# Model whose tokenizer is used to measure transcript excerpts
+TOKENIZER_MODEL = "gpt-4o"
+
+# Upper bound on characters per token, used to avoid encoding more of a long transcript than needed
+MAX_CHARS_PER_TOKEN = 8
+
+# Maximum number of topic transformations in flight at once
+RUBRIC_CONCURRENCY = 8
+
+# Output token budget per topic when several topics are transformed in one request
+BATCH_MAX_TOKENS_PER_TOPIC = 1000
+BATCH_MAX_TOKENS = 16000
+
+# Markdown code fence the model sometimes wraps JSON replies in
+JSON_FENCE_PATTERN = re.compile(r"^```(?:json)?\s*|\s*```$")
+
 # Rubric prompts that guide the LLM in applying each transformation style
 RUBRIC_PROMPTS = {
     RubricType.INSIGHTFUL_CONVERSATIONAL.value: """
@@ -115,24 +150,110 @@ Transform the content into an ELI5 (Explain Like I'm Five) format that:
 """
 }
 
-def apply_rubric(content: Dict[str, Any], rubric_type: str, knowledge_level: int = None) -> Dict[str, Any]:
+# Fixed parts of the transformation prompts; only the topic, content, rubric and
+# knowledge level vary, so prompts are assembled with a single join
+_QA_SYSTEM_PROMPT_HEAD = """
+You are an expert content transformer. Given a topic and its Q&A pairs from a video,
+transform this content according to the specified rubric.
+
+Transformation Rubric Instructions:
+"""
+_QA_PROMPT_HEAD = """
+Topic: """
+_QA_PROMPT_CONTENT_SEP = """
+
+Q&A Content:
+"""
+_TRANSCRIPT_SYSTEM_PROMPT_HEAD = """
+You are an expert content transformer. Given a topic and a video transcript,
+transform this content according to the specified rubric.
+
+Transformation Rubric Instructions:
+"""
+_PROMPT_LEVEL_SEP = """
+
+Knowledge Augmentation Level: """
+_PROMPT_LEVEL_SUFFIX = "/10\n"
+_PROMPT_TAIL = """
+
+Transform the content while maintaining accuracy and the original meaning.
+Keep your response focused on the transformed content only.
+"""
+_TRANSCRIPT_PROMPT_HEAD = f"""
+Video Transcript (omitted passages are marked {TRANSCRIPT_GAP_MARKER}):
+"""
+_TRANSCRIPT_PROMPT_TOPIC_SEP = """
+
+Topic: """
+_TRANSCRIPT_PROMPT_FOCUS_SEP = """
+
+Focus on extracting and transforming content related to the topic '"""
+_TRANSCRIPT_PROMPT_TAIL = """' from the transcript.
+"""
+
+# Precomputed at import so validation does not rebuild the list of rubric values per call
+_VALID_RUBRICS = frozenset(r.value for r in RubricType)
+
+def truncate_tokens(text: str, max_tokens: int) -> Optional[str]:
     """
-    Transform content according to the selected rubric.
+    Truncate text to at most max_tokens tokens.
     
     Args:
-        content (Dict): The content to transform, should contain topics and either qa_pairs or transcript
-        rubric_type (str): The rubric type to apply (must match a RubricType enum value)
-        knowledge_level (int, optional): Level of external knowledge to incorporate (1-10)
-            1: Pure extraction - only information explicitly stated in the video
-            10: Heavy augmentation - extensive external knowledge and analysis
+        text (str): The text to truncate
+        max_tokens (int): Maximum number of tokens to keep
         
     Returns:
-        Dict: The transformed content
+        Optional[str]: The truncated text, or None if no tokenizer is available (tiktoken is
+            an optional dependency)
     """
-    logger.info(f"Applying {rubric_type} rubric to content")
+    # A token is never shorter than one character, so short text needs no encoding
+    if len(text) <= max_tokens:
+        return text
     
+    encoding = get_encoding(TOKENIZER_MODEL)
+    if encoding is None:
+        return None
+    
+    tokens = encoding.encode(text[:max_tokens * MAX_CHARS_PER_TOKEN])
+    if len(tokens) <= max_tokens:
+        return text[:max_tokens * MAX_CHARS_PER_TOKEN]
+    return encoding.decode(tokens[:max_tokens])
+
+def get_transcript_excerpt(transcript: str, max_tokens: int = TRANSCRIPT_EXCERPT_TOKENS) -> str:
+    """
+    Get the leading window of the transcript that is sent to the LLM.
+    
+    The excerpt is measured in tokens when a tokenizer is available, so transcripts in
+    scripts that tokenize densely or sparsely still fill the same share of the prompt.
+    
+    Args:
+        transcript (str): The video transcript
+        max_tokens (int): Maximum size of the excerpt in tokens
+        
+    Returns:
+        str: The transcript excerpt used in transformation prompts, ending with
+            TRANSCRIPT_GAP_MARKER if the rest of the transcript was cut off
+    """
+    excerpt = truncate_tokens(transcript, max_tokens)
+    if excerpt is None:
+        excerpt = transcript[:max_tokens * CHARS_PER_TOKEN_ESTIMATE]
+    if len(excerpt) < len(transcript.rstrip()):
+        return f"{excerpt}\n{TRANSCRIPT_GAP_MARKER}"
+    return excerpt
+
+def resolve_rubric_settings(rubric_type: str, knowledge_level: int = None) -> Tuple[str, int]:
+    """
+    Validate the rubric type and resolve the knowledge level to use with it.
+    
+    Args:
+        rubric_type (str): The requested rubric type
+        knowledge_level (int, optional): The requested knowledge level (1-10)
+        
+    Returns:
+        Tuple[str, int]: A valid rubric type and a knowledge level within 1-10
+    """
     # Validate that rubric_type is valid
-    if rubric_type not in [r.value for r in RubricType]:
+    if rubric_type not in _VALID_RUBRICS:
         logger.error(f"Invalid rubric type: {rubric_type}")
         rubric_type = RubricType.INSIGHTFUL_CONVERSATIONAL.value
         logger.info(f"Falling back to default rubric: {rubric_type}")
@@ -144,30 +265,333 @@ def apply_rubric(content: Dict[str, Any], rubric_type: str, knowledge_level: int
         # Ensure knowledge_level is within valid range
         knowledge_level = max(1, min(10, knowledge_level))
     
+    return rubric_type, knowledge_level
+
+def apply_rubric(content: Dict[str, Any], rubric_type: str, knowledge_level: int = None) -> Dict[str, Any]:
+    """
+    Transform content according to the selected rubric.
+    
+    Synchronous wrapper around apply_rubric_async for callers outside an event loop.
+    
+    Args:
+        content (Dict): The content to transform, should contain topics and either qa_pairs or transcript.
+            May also contain a precomputed transcript_excerpt (see get_transcript_excerpt)
+        rubric_type (str): The rubric type to apply (must match a RubricType enum value)
+        knowledge_level (int, optional): Level of external knowledge to incorporate (1-10)
+            1: Pure extraction - only information explicitly stated in the video
+            10: Heavy augmentation - extensive external knowledge and analysis
+        
+    Returns:
+        Dict: The transformed content
+        
+    Raises:
+        RuntimeError: If called while an event loop is running; await apply_rubric_async instead
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_apply_rubric_and_close(content, rubric_type, knowledge_level))
+    raise RuntimeError("apply_rubric cannot be called from a running event loop; await apply_rubric_async instead")
+
+async def _apply_rubric_and_close(content: Dict[str, Any], rubric_type: str, knowledge_level: int = None) -> Dict[str, Any]:
+    """
+    Run apply_rubric_async, then close the async client it used before the event loop goes away.
+    """
+    try:
+        return await apply_rubric_async(content, rubric_type, knowledge_level)
+    finally:
+        await close_async_client()
+
+def apply_rubrics_bulk(contents: List[Dict[str, Any]], rubric_types: List[str], max_workers: int = 8) -> List[Dict[str, Any]]:
+    """
+    Apply rubrics to many pieces of content at once, such as re-generating a library of videos.
+    
+    Each (content, rubric_type) pair is an independent apply_rubric run. The work is dominated
+    by LLM round-trips, so the runs share a thread pool rather than worker processes.
+    
+    Args:
+        contents (List[Dict]): The content to transform, as accepted by apply_rubric
+        rubric_types (List[str]): The rubric type to apply to each item of contents
+        max_workers (int): Maximum number of apply_rubric runs in progress at once
+        
+    Returns:
+        List[Dict]: The transformed content for each pair, in input order
+    """
+    logger.info(f"Applying rubrics to {len(contents)} items with {max_workers} workers")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(apply_rubric, contents, rubric_types))
+
+async def apply_rubric_async(content: Dict[str, Any], rubric_type: str, knowledge_level: int = None) -> Dict[str, Any]:
+    """
+    Transform content according to the selected rubric, transforming the topics concurrently.
+    
+    Args:
+        content (Dict): The content to transform (see apply_rubric)
+        rubric_type (str): The rubric type to apply (must match a RubricType enum value)
+        knowledge_level (int, optional): Level of external knowledge to incorporate (1-10)
+        
+    Returns:
+        Dict: The transformed content
+    """
+    results = {topic: transformed async for topic, transformed in aiter_apply_rubric(content, rubric_type, knowledge_level)}
+    
+    # Topics complete in any order; restore the order they were given in
+    transformed_content = {topic: results[topic] for topic in content.get("topics", []) if topic in results}
+    
+    logger.info(f"Successfully transformed {len(transformed_content)} topics using {rubric_type} rubric")
+    return {"transformed_content": transformed_content}
+
+async def aiter_apply_rubric(content: Dict[str, Any], rubric_type: str, knowledge_level: int = None) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Transform content according to the selected rubric, yielding each topic as soon as it is done.
+    
+    Args:
+        content (Dict): The content to transform (see apply_rubric)
+        rubric_type (str): The rubric type to apply (must match a RubricType enum value)
+        knowledge_level (int, optional): Level of external knowledge to incorporate (1-10)
+        
+    Yields:
+        Tuple[str, str]: (topic, transformed content) pairs, in completion order
+    """
+    logger.info(f"Applying {rubric_type} rubric to content")
+    
+    rubric_type, knowledge_level = resolve_rubric_settings(rubric_type, knowledge_level)
     logger.info(f"Using knowledge augmentation level: {knowledge_level}/10")
     
-    transformed_content = {}
     topics = content.get("topics", [])
     qa_pairs = content.get("qa_pairs", {})
     transcript = content.get("transcript", "")
+    if not isinstance(topics, list):
+        raise TypeError(f"content['topics'] must be a list, got {type(topics).__name__}")
     
-    # Apply the rubric to each topic
-    for topic in topics:
-        if topic in qa_pairs:
+    # Reuse the excerpt computed once per pipeline run when the caller provides it
+    transcript_excerpt = content.get("transcript_excerpt") or get_transcript_excerpt(transcript)
+    qa_topics, pending, empty_topics = route_topics(topics, qa_pairs, transcript)
+    
+    def fallback(topic):
+        return fallback_transformation(topic, qa_pairs[topic] if topic in qa_topics else None)
+    
+    for topic in empty_topics:
+        yield topic, f"## {topic}\n\n_No content available._"
+    
+    # Transform all Q&A topics in a single request where possible; any topic missing
+    # from the batched reply falls back to its own request below
+    batch_topics = [topic for topic in pending if topic in qa_topics]
+    if len(batch_topics) > 1:
+        batched = await asyncio.to_thread(
+            transform_topics_batched, {topic: qa_pairs[topic] for topic in batch_topics}, rubric_type, knowledge_level
+        )
+        for topic, transformed in batched.items():
+            yield topic, transformed
+        pending = [topic for topic in pending if topic not in batched]
+    
+    # Build every remaining topic's request up front
+    requests = {}
+    for topic in pending:
+        if topic in qa_topics:
             # Use Q&A pairs if available
-            transformed_content[topic] = transform_topic(topic, qa_pairs[topic], rubric_type, knowledge_level)
-        elif transcript:
+            request = build_qa_transform_request(topic, qa_pairs[topic], rubric_type, knowledge_level)
+        else:
             # Use transcript directly if no Q&A pairs but transcript is available
-            transformed_content[topic] = transform_topic_from_transcript(topic, transcript, rubric_type, knowledge_level)
+            request = build_transcript_transform_request(topic, transcript_excerpt, rubric_type, knowledge_level)
+        
+        requests[topic] = request
+    
+    # Send the requests together over one client and connection pool, yielding each topic
+    # as its response arrives; acall_llm serves cached responses without a round-trip and
+    # replays the error of a request that is still backing off from a recent failure
+    submitted = list(requests)
+    responses = iter_submit_many(list(requests.values()), concurrency=RUBRIC_CONCURRENCY)
+    try:
+        async for i, response in responses:
+            topic = submitted[i]
+            if not response or response.startswith("Error"):
+                logger.error(f"Error transforming topic {topic}: {response or llm_cache.EMPTY_RESPONSE_ERROR}")
+                response = fallback(topic)
+            yield topic, response
+    finally:
+        # Closing this generator early must also cancel the requests still in flight
+        await responses.aclose()
+
+def fallback_transformation(topic: str, qa_pairs: List[Dict] = None) -> str:
+    """
+    Build the content used for a topic whose transformation request failed or came back empty.
+    The LLM helpers have already retried transient errors by then.
+    
+    Args:
+        topic (str): The topic that could not be transformed
+        qa_pairs (List[Dict], optional): The topic's Q&A pairs, if it was transformed from them
+        
+    Returns:
+        str: The Q&A pairs formatted as-is, or a note pointing the reader to the transcript
+    """
+    if qa_pairs:
+        return "".join((f"## {topic}\n\n", "\n\n".join(f"**{qa['question']}**\n\n{qa['answer']}" for qa in qa_pairs)))
+    return f"## {topic}\n\nUnable to transform content for this topic. Please check the transcript for information related to {topic}."
+
+def submit_transform_requests(requests: Dict[str, Dict[str, str]], concurrency: int = RUBRIC_CONCURRENCY) -> Dict[str, str]:
+    """
+    Send prebuilt transformation requests as one bulk submission. Like the other
+    transformation paths, they go through call_llm's response cache and failure backoff.
+    
+    Args:
+        requests (Dict[str, Dict[str, str]]): Requests keyed by topic, each with "system_prompt" and "prompt" keys
+        concurrency (int): Maximum number of requests in flight at once
+        
+    Returns:
+        Dict[str, str]: The transformed content for each topic; a topic whose request failed, is
+            still backing off from a recent failure or came back empty gets fallback_transformation
+    """
+    responses = {}
+    for topic, response in zip(requests, call_llm_many(list(requests.values()), concurrency=concurrency)):
+        if not response or response.startswith("Error"):
+            logger.error(f"Error transforming topic {topic}: {response or llm_cache.EMPTY_RESPONSE_ERROR}")
+            response = fallback_transformation(topic)
+        responses[topic] = response
+    return responses
+
+def route_topics(topics: List[str], qa_pairs: Dict[str, List[Dict]], transcript: str) -> Tuple[set, List[str], List[str]]:
+    """
+    Decide how each topic will be transformed.
+    
+    Args:
+        topics (List[str]): The topics to transform
+        qa_pairs (Dict[str, List[Dict]]): Dictionary mapping topics to their Q&A pairs
+        transcript (str): The video transcript
+        
+    Returns:
+        Tuple[set, List[str], List[str]]: The topics to transform from their Q&A pairs, the topics
+            to send to the LLM (from Q&A pairs or the transcript) in their original order, and the
+            topics whose empty Q&A pairs and missing transcript leave nothing to transform
+    """
+    has_transcript = bool(transcript.strip())
+    # Only Q&A pairs with at least one non-blank answer are worth sending to the LLM
+    qa_topics = {topic for topic in topics if has_qa_content(qa_pairs.get(topic))}
+    
+    pending = []
+    empty_topics = []
+    for topic in topics:
+        if topic in qa_topics or has_transcript:
+            pending.append(topic)
+        elif topic in qa_pairs:
+            # Nothing to transform, so the LLM call is skipped entirely
+            logger.warning(f"No Q&A content or transcript for topic: {topic}")
+            empty_topics.append(topic)
         else:
             logger.warning(f"Missing both Q&A pairs and transcript for topic: {topic}")
     
-    logger.info(f"Successfully transformed {len(transformed_content)} topics using {rubric_type} rubric")
-    return {"transformed_content": transformed_content}
+    return qa_topics, pending, empty_topics
+
+def stream_apply_rubric(content: Dict[str, Any], rubric_type: str, knowledge_level: int = None) -> Iterator[Tuple[str, str]]:
+    """
+    Transform content according to the selected rubric, streaming each topic's output as
+    it is generated so callers can render or write it before the topic is complete.
+    
+    Topics are transformed one at a time, in their original order.
+    
+    Args:
+        content (Dict): The content to transform (see apply_rubric)
+        rubric_type (str): The rubric type to apply (must match a RubricType enum value)
+        knowledge_level (int, optional): Level of external knowledge to incorporate (1-10)
+        
+    Yields:
+        Tuple[str, str]: (topic, fragment of its transformed content) events
+        
+    Raises:
+        LLMError: If a topic's LLM call fails; its fragments yielded so far are incomplete
+    """
+    logger.info(f"Streaming {rubric_type} rubric over content")
+    
+    rubric_type, knowledge_level = resolve_rubric_settings(rubric_type, knowledge_level)
+    
+    topics = content.get("topics", [])
+    qa_pairs = content.get("qa_pairs", {})
+    transcript = content.get("transcript", "")
+    if not isinstance(topics, list):
+        raise TypeError(f"content['topics'] must be a list, got {type(topics).__name__}")
+    
+    transcript_excerpt = content.get("transcript_excerpt") or get_transcript_excerpt(transcript)
+    qa_topics, pending, empty_topics = route_topics(topics, qa_pairs, transcript)
+    pending = set(pending)
+    
+    for topic in topics:
+        if topic in qa_topics:
+            fragments = transform_topic_stream(topic, qa_pairs[topic], rubric_type, knowledge_level)
+        elif topic in pending:
+            fragments = apply_rubric_stream(topic, transcript_excerpt, rubric_type, knowledge_level)
+        elif topic in empty_topics:
+            fragments = [f"## {topic}\n\n_No content available._"]
+        else:
+            continue
+        for fragment in fragments:
+            yield topic, fragment
+
+def iter_apply_rubric(content: Dict[str, Any], rubric_type: str, knowledge_level: int = None) -> Iterator[Tuple[str, str]]:
+    """
+    Synchronous wrapper around aiter_apply_rubric, so callers can write each topic out
+    as it completes instead of holding every transformed topic in memory.
+    
+    Args:
+        content (Dict): The content to transform (see apply_rubric)
+        rubric_type (str): The rubric type to apply (must match a RubricType enum value)
+        knowledge_level (int, optional): Level of external knowledge to incorporate (1-10)
+        
+    Yields:
+        Tuple[str, str]: (topic, transformed content) pairs, in completion order
+        
+    Raises:
+        RuntimeError: If iterated while an event loop is running; use aiter_apply_rubric instead
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError("iter_apply_rubric cannot be used from a running event loop; use aiter_apply_rubric instead")
+    
+    loop = asyncio.new_event_loop()
+    results = aiter_apply_rubric(content, rubric_type, knowledge_level)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(results.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(results.aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.run_until_complete(close_async_client())
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
 
-def transform_topic(topic: str, qa_pairs: List[Dict], rubric_type: str, knowledge_level: int) -> str:
+def has_qa_content(qa_pairs: List[Dict]) -> bool:
     """
-    Transform a single topic's Q&A pairs according to the selected rubric.
+    Check whether Q&A pairs contain anything worth transforming.
+    
+    Args:
+        qa_pairs (List[Dict]): List of Q&A pairs, or None
+        
+    Returns:
+        bool: True if at least one pair has a non-blank answer
+    """
+    return any(str(qa.get("answer") or "").strip() for qa in qa_pairs or [])
+
+def format_qa_pairs(qa_pairs: List[Dict]) -> str:
+    """
+    Format Q&A pairs as the plain-text block used in transformation prompts.
+    
+    Args:
+        qa_pairs (List[Dict]): List of Q&A pairs
+        
+    Returns:
+        str: The Q&A pairs, one "Q: ... / A: ..." block per pair
+    """
+    # A generator avoids building an intermediate list of formatted pairs
+    return "\n\n".join(f"Q: {qa['question']}\nA: {qa['answer']}" for qa in qa_pairs)
+
+def build_qa_transform_request(topic: str, qa_pairs: List[Dict], rubric_type: str, knowledge_level: int) -> Dict[str, str]:
+    """
+    Build the LLM request that transforms a single topic from its Q&A pairs.
     
     Args:
         topic (str): The topic to transform
@@ -176,10 +600,49 @@ def transform_topic(topic: str, qa_pairs: List[Dict], rubric_type: str, knowledg
         knowledge_level (int): Level of external knowledge to incorporate (1-10)
         
     Returns:
-        str: The transformed content for the topic
+        Dict[str, str]: The request, with "system_prompt" and "prompt" keys
     """
     # Prepare the content in a structured format for the LLM
-    formatted_qa = "\n\n".join([f"Q: {qa['question']}\nA: {qa['answer']}" for qa in qa_pairs])
+    formatted_qa = format_qa_pairs(qa_pairs)
+    
+    # The rubric instructions are identical for every topic of a video, so they go first
+    # as the system prompt and form a cacheable prefix; the topic-specific content comes last
+    system_prompt = build_qa_system_prompt(rubric_type, knowledge_level)
+    prompt = "".join((_QA_PROMPT_HEAD, topic, _QA_PROMPT_CONTENT_SEP, formatted_qa, "\n"))
+    
+    return {"system_prompt": system_prompt, "prompt": prompt}
+
+def transform_topics_batched(topics_with_qa: Dict[str, List[Dict]], rubric_type: str, knowledge_level: int) -> Dict[str, str]:
+    """
+    Transform several topics' Q&A pairs in a single LLM request.
+    
+    Each topic is first looked up in the response cache under the key of its own
+    single-topic request; only the misses are batched. The rubric instructions are sent
+    once for all of them and the model replies with a JSON object mapping each topic to
+    its transformed content, which is then cached per topic.
+    
+    Args:
+        topics_with_qa (Dict[str, List[Dict]]): Dictionary mapping topics to their Q&A pairs
+        rubric_type (str): The rubric type to apply
+        knowledge_level (int): Level of external knowledge to incorporate (1-10)
+        
+    Returns:
+        Dict[str, str]: The transformed content for each topic that was cached or found in the
+            reply; a single uncached topic is left to its own request, as are all uncached
+            topics if the request fails or the reply cannot be parsed
+    """
+    transformed = {}
+    requests = {}
+    for topic, qa_pairs in topics_with_qa.items():
+        request = build_qa_transform_request(topic, qa_pairs, rubric_type, knowledge_level)
+        cached = get_cached_response(request["prompt"], system_prompt=request["system_prompt"])
+        if cached is not None:
+            transformed[topic] = cached
+        else:
+            requests[topic] = request
+    
+    if len(requests) < 2:
+        return transformed
     
     # Get the appropriate prompt for the selected rubric
     rubric_prompt = RUBRIC_PROMPTS[rubric_type]
@@ -187,15 +650,9 @@ def transform_topic(topic: str, qa_pairs: List[Dict], rubric_type: str, knowledg
     # Create knowledge level guidance based on the level
     knowledge_guidance = get_knowledge_level_guidance(knowledge_level)
     
-    # Prepare the prompt for the LLM
-    prompt = f"""
-You are an expert content transformer. Given a topic and its Q&A pairs from a video,
-transform this content according to the specified rubric.
-
-Topic: {topic}
-
-Q&A Content:
-{formatted_qa}
+    system_prompt = f"""
+You are an expert content transformer. Given several topics and their Q&A pairs from a video,
+transform the content of each topic according to the specified rubric.
 
 Transformation Rubric Instructions:
 {rubric_prompt}
@@ -204,122 +661,288 @@ Knowledge Augmentation Level: {knowledge_level}/10
 {knowledge_guidance}
 
 Transform the content while maintaining accuracy and the original meaning.
-Keep your response focused on the transformed content only.
+Respond with a JSON object that maps each topic name, exactly as given, to its transformed content as a string.
 """
     
+    prompt = "\n\n".join(
+        f"### Topic {i}: {topic}\n" + format_qa_pairs(topics_with_qa[topic])
+        for i, topic in enumerate(requests, start=1)
+    )
+    max_tokens = min(BATCH_MAX_TOKENS_PER_TOPIC * len(requests), BATCH_MAX_TOKENS)
+    
     try:
-        # Call the LLM to transform the content
-        transformed = call_llm(prompt)
-        logger.debug(f"Successfully transformed topic: {topic}")
-        return transformed
+        response = call_llm(prompt, max_tokens=max_tokens, system_prompt=system_prompt)
+        result = json_utils.loads(JSON_FENCE_PATTERN.sub("", response.strip()))
+        if not isinstance(result, dict):
+            raise ValueError("Batched response is not a JSON object")
         
     except Exception as e:
-        logger.exception(f"Error transforming topic {topic}: {str(e)}")
-        # Return a fallback transformation
-        return f"## {topic}\n\n" + "\n\n".join([f"**{qa['question']}**\n\n{qa['answer']}" for qa in qa_pairs])
+        logger.warning(f"Batched transformation failed, transforming topics individually: {str(e)}")
+        return transformed
+    
+    # Cache each topic's result as the response to its single-topic request
+    for topic, request in requests.items():
+        if isinstance(result.get(topic), str):
+            transformed[topic] = result[topic]
+            cache_response(result[topic], request["prompt"], system_prompt=request["system_prompt"])
+    logger.debug(f"Batched transformation returned {len(transformed)} of {len(topics_with_qa)} topics")
+    return transformed
 
-def transform_topic_from_transcript(topic: str, transcript: str, rubric_type: str, knowledge_level: int) -> str:
+def _build_system_prompt(head: str, rubric_type: str, knowledge_level: int) -> str:
     """
-    Transform a single topic using the transcript directly (without Q&A pairs).
+    Build a transformation system prompt from its fixed head, the rubric and the knowledge level.
     
     Args:
-        topic (str): The topic to transform
-        transcript (str): The video transcript
+        head (str): The fixed opening instructions, ending with the rubric instructions heading
         rubric_type (str): The rubric type to apply
         knowledge_level (int): Level of external knowledge to incorporate (1-10)
         
     Returns:
-        str: The transformed content for the topic
+        str: The system prompt
     """
-    # Get the appropriate prompt for the selected rubric
-    rubric_prompt = RUBRIC_PROMPTS[rubric_type]
+    return "".join((
+        head, RUBRIC_PROMPTS[rubric_type],
+        _PROMPT_LEVEL_SEP, str(knowledge_level), _PROMPT_LEVEL_SUFFIX, get_knowledge_level_guidance(knowledge_level),
+        _PROMPT_TAIL
+    ))
+
+@lru_cache(maxsize=128)
+def build_qa_system_prompt(rubric_type: str, knowledge_level: int) -> str:
+    """
+    Build the system prompt for transforming topics from their Q&A pairs.
     
-    # Create knowledge level guidance based on the level
-    knowledge_guidance = get_knowledge_level_guidance(knowledge_level)
+    Args:
+        rubric_type (str): The rubric type to apply
+        knowledge_level (int): Level of external knowledge to incorporate (1-10)
+        
+    Returns:
+        str: The system prompt, which depends only on the rubric and knowledge level, so it is
+            built once per combination and the same string is shared by every topic
+    """
+    return _build_system_prompt(_QA_SYSTEM_PROMPT_HEAD, rubric_type, knowledge_level)
+
+@lru_cache(maxsize=128)
+def build_transcript_system_prompt(rubric_type: str, knowledge_level: int) -> str:
+    """
+    Build the system prompt for transforming topics from a transcript.
     
-    # Prepare the prompt for the LLM
-    prompt = f"""
-You are an expert content transformer. Given a topic and a video transcript,
-transform this content according to the specified rubric.
+    Args:
+        rubric_type (str): The rubric type to apply
+        knowledge_level (int): Level of external knowledge to incorporate (1-10)
+        
+    Returns:
+        str: The system prompt, which depends only on the rubric and knowledge level
+    """
+    return _build_system_prompt(_TRANSCRIPT_SYSTEM_PROMPT_HEAD, rubric_type, knowledge_level)
 
-Topic: {topic}
+def build_transcript_transform_request(topic: str, transcript: str, rubric_type: str, knowledge_level: int) -> Dict[str, str]:
+    """
+    Build the LLM request that transforms a single topic from the transcript.
+    
+    Args:
+        topic (str): The topic to transform
+        transcript (str): The transcript text to send as-is: the excerpt from get_transcript_excerpt
+            or the topic's window from topic_windowing, never the whole transcript
+        rubric_type (str): The rubric type to apply
+        knowledge_level (int): Level of external knowledge to incorporate (1-10)
+        
+    Returns:
+        Dict[str, str]: The request, with "system_prompt" and "prompt" keys
+    """
+    # The system prompt only depends on the rubric and knowledge level, so it is
+    # byte-identical across the topics of a video and forms a cacheable prefix;
+    # the topic-specific transcript and instructions come last.
+    system_prompt = build_transcript_system_prompt(rubric_type, knowledge_level)
+    
+    prompt = "".join((
+        _TRANSCRIPT_PROMPT_HEAD, transcript,
+        _TRANSCRIPT_PROMPT_TOPIC_SEP, topic,
+        _TRANSCRIPT_PROMPT_FOCUS_SEP, topic, _TRANSCRIPT_PROMPT_TAIL
+    ))
+    
+    return {"system_prompt": system_prompt, "prompt": prompt}
 
-Video Transcript:
-{transcript[:2000]}... [transcript continues]
+def transform_topic_stream(topic: str, qa_pairs: List[Dict], rubric_type: str, knowledge_level: int) -> Iterator[str]:
+    """
+    Transform a single topic's Q&A pairs, yielding the result as it is generated.
+    
+    Args:
+        topic (str): The topic to transform
+        qa_pairs (List[Dict]): List of Q&A pairs for the topic
+        rubric_type (str): The rubric type to apply
+        knowledge_level (int): Level of external knowledge to incorporate (1-10)
+        
+    Yields:
+        str: Fragments of the transformed content for the topic
+        
+    Raises:
+        LLMError: If the LLM call fails, or failed recently and is still backing off; fragments
+            yielded before the failure are incomplete
+    """
+    if not has_qa_content(qa_pairs):
+        yield f"## {topic}\n\n_No content available._"
+        return
+    
+    request = build_qa_transform_request(topic, qa_pairs, rubric_type, knowledge_level)
+    
+    # Stream the LLM output to the caller as it arrives
+    yield from call_llm_stream(request["prompt"], system_prompt=request["system_prompt"], safe=False)
+    logger.debug(f"Successfully streamed transformation for topic: {topic}")
 
-Transformation Rubric Instructions:
-{rubric_prompt}
+def apply_rubric_stream(topic: str, transcript: str, rubric_type: str, knowledge_level: int = None) -> Iterator[str]:
+    """
+    Transform a single topic from the transcript, yielding the result as it is generated.
+    
+    Args:
+        topic (str): The topic to transform
+        transcript (str): The transcript excerpt or topic window (see build_transcript_transform_request)
+        rubric_type (str): The rubric type to apply (must match a RubricType enum value)
+        knowledge_level (int, optional): Level of external knowledge to incorporate (1-10)
+        
+    Yields:
+        str: Fragments of the transformed content for the topic
+        
+    Raises:
+        LLMError: If the LLM call fails, or failed recently and is still backing off; fragments
+            yielded before the failure are incomplete
+    """
+    rubric_type, knowledge_level = resolve_rubric_settings(rubric_type, knowledge_level)
+    request = build_transcript_transform_request(topic, transcript, rubric_type, knowledge_level)
+    
+    # Stream the LLM output to the caller as it arrives
+    yield from call_llm_stream(request["prompt"], system_prompt=request["system_prompt"], safe=False)
+    logger.debug(f"Successfully streamed transformation for topic: {topic}")
 
-Knowledge Augmentation Level: {knowledge_level}/10
-{knowledge_guidance}
+class RubricSession:
+    """
+    A multi-turn conversation that transforms several topics of one transcript with one rubric.
+    
+    The rubric instructions and transcript (up to SESSION_TRANSCRIPT_TOKENS) are sent once at
+    the start of the conversation; each transform() call adds a single "transform this topic"
+    turn, so every request shares the same growing prefix and the provider can reuse its
+    prompt cache.
+    """
+    
+    def __init__(self, transcript: str, rubric_type: str, knowledge_level: int = None):
+        """
+        Start a session for the given transcript and rubric.
+        
+        Args:
+            transcript (str): The video transcript
+            rubric_type (str): The rubric type to apply
+            knowledge_level (int, optional): Level of external knowledge to incorporate (1-10)
+        """
+        self.rubric_type, self.knowledge_level = resolve_rubric_settings(rubric_type, knowledge_level)
+        self.system_prompt = build_transcript_system_prompt(self.rubric_type, self.knowledge_level)
+        self.messages = [{
+            "role": "user",
+            "content": f"""
+Video Transcript (omitted passages are marked {TRANSCRIPT_GAP_MARKER}):
+{get_transcript_excerpt(transcript, SESSION_TRANSCRIPT_TOKENS)}
 
-Focus on extracting and transforming content related to the topic '{topic}' from the transcript.
-Transform the content while maintaining accuracy and the original meaning.
-Keep your response focused on the transformed content only.
+I will ask you to transform one topic from this transcript at a time.
 """
+        }]
     
-    try:
-        # Call the LLM to transform the content
-        transformed = call_llm(prompt)
-        logger.debug(f"Successfully transformed topic from transcript: {topic}")
-        return transformed
+    def transform(self, topic: str) -> str:
+        """
+        Transform a single topic within the session.
         
-    except Exception as e:
-        logger.exception(f"Error transforming topic {topic} from transcript: {str(e)}")
-        # Return a fallback transformation
-        return f"## {topic}\n\nUnable to transform content for this topic. Please check the transcript for information related to {topic}."
+        Args:
+            topic (str): The topic to transform
+            
+        Returns:
+            str: The transformed content for the topic, or fallback_transformation if the request
+                fails or comes back empty
+        """
+        prompt = f"Focus on extracting and transforming content related to the topic '{topic}' from the transcript."
+        
+        try:
+            transformed = call_llm(prompt, system_prompt=self.system_prompt, messages=self.messages, safe=False)
+            if not transformed:
+                raise ValueError("The LLM returned an empty response")
+            # Only successful turns become part of the shared conversation
+            self.messages.append({"role": "user", "content": prompt})
+            self.messages.append({"role": "assistant", "content": transformed})
+            logger.debug(f"Successfully transformed topic in rubric session: {topic}")
+            return transformed
+            
+        except Exception as e:
+            logger.exception(f"Error transforming topic {topic} in rubric session: {str(e)}")
+            return fallback_transformation(topic)
 
-def get_knowledge_level_guidance(level: int) -> str:
+def apply_rubric_session(transcript: str, rubric_type: str, knowledge_level: int = None) -> RubricSession:
     """
-    Generate guidance text for the specified knowledge augmentation level.
+    Start a rubric session that transforms topics one at a time over a shared conversation.
     
     Args:
-        level (int): Knowledge augmentation level (1-10)
+        transcript (str): The video transcript
+        rubric_type (str): The rubric type to apply (must match a RubricType enum value)
+        knowledge_level (int, optional): Level of external knowledge to incorporate (1-10)
         
     Returns:
-        str: Guidance text for the LLM
+        RubricSession: The session; call transform(topic) for each topic
     """
-    if level <= 2:
-        return """
+    logger.info(f"Starting {rubric_type} rubric session")
+    return RubricSession(transcript, rubric_type, knowledge_level)
+
+# Knowledge augmentation guidance, as (highest level the text applies to, guidance text)
+KNOWLEDGE_GUIDANCE_BANDS = (
+    (2, """
 IMPORTANT: Use ONLY information explicitly stated in the video content.
 - Do NOT add any external knowledge, context, or analysis
 - Focus exclusively on summarizing/organizing what was directly said or shown
 - If the content lacks information on a topic, simply note that it wasn't covered
 - NEVER make assumptions or fill in gaps with external knowledge
-"""
-    elif level <= 4:
-        return """
+"""),
+    (4, """
 IMPORTANT: Primarily use information from the video content (approximately 80-90%).
 - Add minimal external context ONLY when necessary to clarify concepts mentioned in the video
 - Clearly mark any added context with [Context: ...]
 - Focus on organizing and presenting what was actually in the video
 - Keep external additions brief and only for clarification purposes
-"""
-    elif level <= 6:
-        return """
+"""),
+    (6, """
 IMPORTANT: Balance video content (approximately 70%) with helpful contextual information.
 - Add moderate external context to enhance understanding of concepts in the video
 - Clearly distinguish between video content and added information
 - Use phrases like "Additionally, ..." or "For context, ..." to introduce external knowledge
 - Ensure the video's core content remains the primary focus
-"""
-    elif level <= 8:
-        return """
+"""),
+    (8, """
 IMPORTANT: Enhance video content (approximately 50-60%) with substantial contextual information.
 - Add significant external knowledge to place the video in broader context
 - Use clear section breaks or formatting to distinguish video content from added information
 - Develop concepts mentioned briefly in the video with additional explanation
 - Create a comprehensive resource that extends beyond the original video
-"""
-    else:  # 9-10
-        return """
+"""),
+    (10, """
 IMPORTANT: Create a comprehensive resource using the video as a starting point.
 - Extensively augment the video content (which may be 30-40% of the final output)
 - Add detailed explanations, examples, and related concepts not mentioned in the video
 - Organize content logically, which may differ from the video's structure
 - Develop a thorough treatment of the topic that goes well beyond the original video
 - Always maintain a section that summarizes what was actually in the original video
-"""
+"""),
+)
+
+# Guidance for each knowledge level 1-10, resolved once at import
+_KNOWLEDGE_GUIDANCE = {
+    level: next(text for max_level, text in KNOWLEDGE_GUIDANCE_BANDS if level <= max_level)
+    for level in range(1, 11)
+}
+
+def get_knowledge_level_guidance(level: int) -> str:
+    """
+    Generate guidance text for the specified knowledge augmentation level.
+    
+    Args:
+        level (int): Knowledge augmentation level (1-10)
+        
+    Returns:
+        str: Guidance text for the LLM
+    """
+    return _KNOWLEDGE_GUIDANCE[max(1, min(10, int(level)))]
 
 if __name__ == "__main__":
     # Simple test case
@@ -3,14 +3,749 @@ Utility functions to call a Large Language Model (LLM) API.
 Provides both standard calls and structured output capabilities.
 """
 import os
+import re
+import sys
 import time
 import json
-from typing import Dict, Any, List, Optional, Union
-from openai import OpenAI
-from openai import OpenAIError
+import random
+import asyncio
+import weakref
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Union, Iterator, AsyncIterator, Tuple, TYPE_CHECKING
 import logging
+from src.utils import llm_cache
+from src.utils import json_utils
 
-def call_llm(prompt, model="gpt-4o", temperature=0.7, max_tokens=1000, timeout=60):
+logger = logging.getLogger(__name__)
+
+# openai pulls in pydantic, httpx and anyio, so it is imported on first use rather than
+# at module import; callers that never reach the API do not pay for loading it
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+__all__ = [
+    "call_llm",
+    "acall_llm",
+    "call_llm_stream",
+    "call_llm_structured",
+    "call_llm_many",
+    "call_llm_batch",
+    "submit_many",
+    "iter_submit_many",
+    "count_tokens",
+    "get_encoding",
+    "refresh_api_key",
+    "close_async_client",
+    "prewarm_connection",
+    "canonical_system_prompt",
+    "cache_hit_ratio",
+    "get_cached_response",
+    "cache_response",
+    "build_cached_prompt",
+    "LLMError",
+    "LLMTimeout",
+    "LLMRateLimit",
+    "LLMAuthError",
+]
+
+# Rough characters-per-token ratio for English text, used when tiktoken is not installed
+CHARS_PER_TOKEN_ESTIMATE = 4
+
+class LLMError(Exception):
+    """Raised by the call_llm helpers when called with safe=False and the LLM call fails."""
+    
+    def __init__(self, message: str = "", retry_after: float = None):
+        super().__init__(message)
+        # Seconds the server asked to wait before retrying, if it said
+        self.retry_after = retry_after
+
+class LLMTimeout(LLMError):
+    """The LLM API call timed out."""
+
+class LLMRateLimit(LLMError):
+    """The LLM API rejected the call because of rate limiting."""
+
+class LLMAuthError(LLMError):
+    """The API key is missing or was rejected."""
+
+# Connection pool of the shared client; idle connections are kept alive between calls
+# so that sequential requests reuse them instead of repeating the TCP and TLS handshakes
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_MAX_CONNECTIONS = 100
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 30.0
+HTTP_CONNECT_TIMEOUT_SECONDS = 10.0
+
+@lru_cache(maxsize=4)
+def _get_client(api_key: str) -> "OpenAI":
+    """
+    Get the OpenAI client for an API key, creating it on first use.
+    
+    Reusing one client keeps its connection pool alive, so later calls skip the
+    TCP and TLS handshakes.
+    
+    Args:
+        api_key (str): The OpenAI API key
+        
+    Returns:
+        OpenAI: The shared client
+    """
+    import httpx
+    from openai import OpenAI
+    
+    # Retries are handled by _with_retries, so the SDK's own retries are turned off
+    return OpenAI(
+        api_key=api_key,
+        max_retries=0,
+        http_client=httpx.Client(
+            limits=httpx.Limits(
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                max_connections=HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            # Fail fast on unreachable hosts; the per-request timeout still bounds the whole call
+            timeout=httpx.Timeout(60.0, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+        )
+    )
+
+# Event loop -> AsyncOpenAI client; async clients are bound to the loop they are used on,
+# so calls within one loop share a connection pool until close_async_client is awaited
+_async_clients = weakref.WeakKeyDictionary()
+
+def _get_async_client(api_key: str):
+    """
+    Get the AsyncOpenAI client for the running event loop, creating it on first use.
+    
+    Args:
+        api_key (str): The OpenAI API key
+        
+    Returns:
+        AsyncOpenAI: The client shared by all calls on this loop
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx
+        from openai import AsyncOpenAI
+        
+        client = AsyncOpenAI(
+            api_key=api_key,
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS
+                ),
+                timeout=httpx.Timeout(60.0, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+            )
+        )
+        _async_clients[loop] = client
+    return client
+
+async def close_async_client():
+    """
+    Close the running event loop's shared AsyncOpenAI client, if one was created.
+    
+    Call it before a loop that used acall_llm shuts down, e.g. at the end of the coroutine
+    passed to asyncio.run; the synchronous wrappers in this module do so themselves.
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+# API key, read from the environment on first use; see refresh_api_key
+_API_KEY = None
+
+def _api_key() -> Optional[str]:
+    """
+    Get the OpenAI API key, reading OPENAI_API_KEY once it has been set.
+    
+    Returns:
+        Optional[str]: The API key, or None if it is not set
+    """
+    global _API_KEY
+    if _API_KEY is None:
+        _API_KEY = os.environ.get("OPENAI_API_KEY")
+    return _API_KEY
+
+def refresh_api_key():
+    """
+    Re-read OPENAI_API_KEY on the next call and drop the clients built for the old key,
+    e.g. after rotating the key in a long-running process.
+    """
+    global _API_KEY
+    _API_KEY = None
+    _get_client.cache_clear()
+    _async_clients.clear()
+
+# Set PF_PREWARM_LLM=1 to open the API connection in the background when this module is
+# imported, so the first LLM call does not wait for the TCP and TLS handshakes
+PREWARM_ENABLED = os.environ.get("PF_PREWARM_LLM") == "1"
+PREWARM_TIMEOUT_SECONDS = 2
+
+def _prewarm(api_key: str):
+    """
+    Open a pooled connection to the API host with a cheap HEAD request.
+    
+    Args:
+        api_key (str): The OpenAI API key
+    """
+    try:
+        client = _get_client(api_key)
+        client._client.head(str(client.base_url), timeout=PREWARM_TIMEOUT_SECONDS)
+        logger.debug("OpenAI API connection pre-warmed")
+    except Exception as e:
+        # Pre-warming is best effort; the first real call simply opens the connection itself
+        logger.debug("Could not pre-warm OpenAI API connection: %s", e)
+
+def prewarm_connection():
+    """
+    Start opening the shared client's connection to the API in a daemon thread.
+    """
+    api_key = _api_key()
+    if not api_key:
+        return
+    threading.Thread(target=_prewarm, args=(api_key,), name="openai-prewarm", daemon=True).start()
+
+# Transient API failures are retried with exponential backoff and jitter
+MAX_RETRIES = 3
+MAX_RETRY_DELAY_SECONDS = 60
+
+@lru_cache(maxsize=1)
+def _retryable_errors() -> tuple:
+    """
+    Get the OpenAI exception types that are worth retrying.
+    
+    Returns:
+        tuple: Rate-limit, timeout, connection and server error classes
+    """
+    from openai import RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+    return (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+def _retry_after(api_error: Exception) -> Optional[float]:
+    """
+    Read the server's Retry-After header from a failed API call, e.g. a 429 response.
+    
+    Args:
+        api_error (Exception): The exception raised by the API call
+        
+    Returns:
+        Optional[float]: Seconds the server asked to wait, or None if it did not say (Retry-After
+            given as an HTTP date is ignored)
+    """
+    response = getattr(api_error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return None
+
+def _retry_delay(attempt: int, api_error: Exception) -> float:
+    """
+    Compute how long to wait before retrying a failed API call.
+    
+    Args:
+        attempt (int): Number of attempts made so far, minus one
+        api_error (Exception): The retryable exception raised by the API call
+        
+    Returns:
+        float: Seconds to wait; the server's Retry-After header is honoured when present
+    """
+    retry_after = _retry_after(api_error)
+    if retry_after is not None:
+        return min(retry_after, MAX_RETRY_DELAY_SECONDS)
+    return min(2 ** attempt, MAX_RETRY_DELAY_SECONDS) + random.random()
+
+def _with_retries(create, **kwargs):
+    """
+    Call an API method, retrying rate-limit, timeout, connection and server errors.
+    
+    Args:
+        create (Callable): The client method to call
+        **kwargs: Arguments for the call
+        
+    Returns:
+        The API response; the last exception is raised once the retries are exhausted
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return create(**kwargs)
+        except _retryable_errors() as api_error:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = _retry_delay(attempt, api_error)
+            logger.warning("Retryable OpenAI API error (%s), retrying in %.1f seconds", type(api_error).__name__, delay)
+            time.sleep(delay)
+
+async def _with_retries_async(create, **kwargs):
+    """
+    Async counterpart of _with_retries for AsyncOpenAI client methods.
+    
+    Args:
+        create (Callable): The async client method to call
+        **kwargs: Arguments for the call
+        
+    Returns:
+        The API response; the last exception is raised once the retries are exhausted
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return await create(**kwargs)
+        except _retryable_errors() as api_error:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = _retry_delay(attempt, api_error)
+            logger.warning("Retryable OpenAI API error (%s), retrying in %.1f seconds", type(api_error).__name__, delay)
+            await asyncio.sleep(delay)
+
+# Model -> [calls, input tokens, input tokens served from the provider's prompt cache]
+_usage_totals = {}
+_usage_lock = threading.Lock()
+
+# Log the running prompt-cache hit ratio at INFO level every this many calls per model
+CACHE_STATS_LOG_INTERVAL = 50
+
+def _log_usage(response, elapsed: float):
+    """
+    Record and log the token usage of an API response, including how much of the prompt
+    was served from the provider's prompt cache.
+    
+    Args:
+        response: The Chat Completions or Responses API response
+        elapsed (float): Seconds the call took
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    # Chat Completions reports prompt/completion tokens, the Responses API input/output tokens
+    input_tokens = getattr(usage, "prompt_tokens", None) or getattr(usage, "input_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None) or getattr(usage, "input_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", 0) or 0
+    
+    model = getattr(response, "model", None) or "unknown"
+    with _usage_lock:
+        totals = _usage_totals.setdefault(model, [0, 0, 0])
+        totals[0] += 1
+        totals[1] += input_tokens
+        totals[2] += cached_tokens
+        calls, total_input, total_cached = totals
+    if calls % CACHE_STATS_LOG_INTERVAL == 0 and total_input:
+        logger.info(
+            "Prompt cache hit ratio for %s after %d calls: %.1f%% of %d input tokens",
+            model, calls, 100 * total_cached / total_input, total_input
+        )
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        output_tokens = getattr(usage, "completion_tokens", None) or getattr(usage, "output_tokens", 0)
+        logger.debug(
+            "OpenAI API call completed in %.2f seconds: %s input tokens (%s cached), %s output tokens",
+            elapsed, input_tokens, cached_tokens, output_tokens
+        )
+
+def cache_hit_ratio(model: str = None) -> float:
+    """
+    Get the share of input tokens that the provider served from its prompt cache.
+    
+    Args:
+        model (str, optional): The model, as reported in API responses (e.g. a dated
+            snapshot such as "gpt-4o-2024-08-06"); all models when omitted
+        
+    Returns:
+        float: Cached input tokens / input tokens since the process started (0.0 before any call)
+    """
+    with _usage_lock:
+        if model is None:
+            totals = list(_usage_totals.values())
+        else:
+            totals = [_usage_totals[model]] if model in _usage_totals else []
+        total_input = sum(t[1] for t in totals)
+        total_cached = sum(t[2] for t in totals)
+    return total_cached / total_input if total_input else 0.0
+
+@lru_cache(maxsize=1)
+def _error_messages() -> Dict[type, Tuple[type, str]]:
+    """
+    Get the user-facing messages for the API errors that get a specific message.
+    
+    Returns:
+        Dict[type, Tuple[type, str]]: Exception class -> (LLMError subclass raised for it,
+            message template formatted with elapsed)
+    """
+    from openai import APITimeoutError, RateLimitError, AuthenticationError
+    return {
+        APITimeoutError: (LLMTimeout, "LLM API call timed out after {elapsed:.1f} seconds."),
+        TimeoutError: (LLMTimeout, "LLM API call timed out after {elapsed:.1f} seconds."),
+        RateLimitError: (LLMRateLimit, "Rate limit exceeded. Please try again later."),
+        AuthenticationError: (LLMAuthError, "Authentication failed. Please check your API key."),
+    }
+
+def _classify_api_error(api_error: Exception) -> Optional[Tuple[type, str]]:
+    """
+    Look up how an API exception is reported, by its class.
+    
+    Args:
+        api_error (Exception): The exception raised by the API call
+        
+    Returns:
+        Optional[Tuple[type, str]]: The LLMError subclass and message template, or None if
+            the error has no specific message
+    """
+    messages = _error_messages()
+    for error_class in type(api_error).__mro__:
+        if error_class in messages:
+            return messages[error_class]
+    return None
+
+def _describe_api_error(api_error: Exception, elapsed: float) -> Optional[str]:
+    """
+    Look up the user-facing message for an API exception by its class.
+    
+    Args:
+        api_error (Exception): The exception raised by the API call
+        elapsed (float): Seconds spent on the call before it failed
+        
+    Returns:
+        Optional[str]: The message, or None if the error has no specific message
+    """
+    classified = _classify_api_error(api_error)
+    if classified is None:
+        return None
+    return classified[1].format(elapsed=elapsed)
+
+def _to_llm_error(api_error: Exception, elapsed: float) -> LLMError:
+    """
+    Convert an OpenAI API exception into the LLMError raised when safe=False.
+    
+    Args:
+        api_error (Exception): The exception raised by the API call
+        elapsed (float): Seconds spent on the call before it failed
+        
+    Returns:
+        LLMError: The typed exception, carrying the same message as the error string and the
+            server's Retry-After delay, if any
+    """
+    classified = _classify_api_error(api_error)
+    error_class = classified[0] if classified is not None else LLMError
+    return error_class(_format_api_error(api_error, elapsed), retry_after=_retry_after(api_error))
+
+def _format_api_error(api_error: Exception, elapsed: float) -> str:
+    """
+    Convert an OpenAI API exception into the error string returned by the call_llm helpers.
+    
+    Args:
+        api_error (Exception): The exception raised by the API call
+        elapsed (float): Seconds spent on the call before it failed
+        
+    Returns:
+        str: The error message, always starting with "Error"
+    """
+    message = _describe_api_error(api_error, elapsed)
+    if message is not None:
+        return f"Error: {message}"
+    return f"Error calling LLM API: {str(api_error)}"
+
+# In-process LRU cache of responses to deterministic requests (temperature at or below
+# DETERMINISTIC_TEMPERATURE); sampled responses are only cached in the opt-in on-disk store
+# (llm_cache.LLM_CACHE_PATH), so repeated calls in a normal run still vary
+RESPONSE_CACHE_SIZE = 512
+DETERMINISTIC_TEMPERATURE = 0.01
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+def _lookup_response(params: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """
+    Look up a request in the response caches: the in-process cache for deterministic requests
+    (temperature at or below DETERMINISTIC_TEMPERATURE), then the on-disk cache if it is enabled.
+    
+    Args:
+        params (Dict[str, Any]): Every request parameter that affects the response, including "temperature"
+        
+    Returns:
+        Tuple[str, Optional[str]]: (cache key, which also tracks the request's failures; cached response or None)
+    """
+    cache_key = llm_cache.make_request_key(params)
+    cached = None
+    if params["temperature"] <= DETERMINISTIC_TEMPERATURE:
+        with _response_cache_lock:
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                _response_cache.move_to_end(cache_key)
+        if cached is not None:
+            logger.debug("LLM response served from in-process cache: %s", cache_key[:12])
+            return cache_key, cached
+    return cache_key, llm_cache.lookup(cache_key)
+
+def _store_response(cache_key: str, response: str, temperature: float):
+    """
+    Store a successful response in the response caches that apply to its request.
+    
+    Args:
+        cache_key (str): The key returned by _lookup_response
+        response (str): The response text
+        temperature (float): The request's sampling temperature
+    """
+    if not response:
+        return
+    llm_cache.clear_failure(cache_key)
+    if temperature <= DETERMINISTIC_TEMPERATURE:
+        with _response_cache_lock:
+            _response_cache[cache_key] = response
+            _response_cache.move_to_end(cache_key)
+            if len(_response_cache) > RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+    llm_cache.store(cache_key, response)
+
+# OpenAI only caches prompt prefixes of at least this many tokens
+PROMPT_CACHE_MIN_TOKENS = 1024
+TRAILING_WHITESPACE_PATTERN = re.compile(r"[ \t]+\n")
+
+@lru_cache(maxsize=128)
+def canonical_system_prompt(system_prompt: str) -> str:
+    """
+    Normalize a system prompt so that equivalent prompts are sent byte-for-byte identical.
+    
+    Trailing whitespace is stripped from each line and from the end, so prompts rebuilt with
+    incidental whitespace drift still share OpenAI's cached prompt prefix and the response
+    cache keys. The result is interned, so repeated prompts share one string object.
+    
+    Args:
+        system_prompt (str): The system prompt
+        
+    Returns:
+        str: The canonical system prompt
+    """
+    canonical = sys.intern(TRAILING_WHITESPACE_PATTERN.sub("\n", system_prompt).rstrip())
+    # Logged once per distinct prompt, thanks to the lru_cache; counting tokens means
+    # encoding the whole prompt, so it is skipped unless debug output is enabled
+    if logger.isEnabledFor(logging.DEBUG):
+        tokens = count_tokens(canonical)
+        if tokens < PROMPT_CACHE_MIN_TOKENS:
+            logger.debug(
+                "System prompt has %d tokens, below the %d-token minimum for OpenAI prompt caching",
+                tokens, PROMPT_CACHE_MIN_TOKENS
+            )
+    return canonical
+
+def build_cached_prompt(content: str, schema_desc: str = None, few_shot: str = None,
+                        instructions: str = None) -> Dict[str, str]:
+    """
+    Assemble a request with its invariant parts first, so that they form a prefix the
+    provider can cache across calls: schema description, then examples, then instructions
+    in the system prompt, and only the per-call content in the user prompt.
+    
+    Args:
+        content (str): The content that changes from call to call
+        schema_desc (str, optional): Description of the expected output
+        few_shot (str, optional): Worked examples
+        instructions (str, optional): Task instructions
+        
+    Returns:
+        Dict[str, str]: The request, with "system_prompt" and "prompt" keys, as accepted by
+            call_llm and call_llm_many (pass them as system_prompt/user_prompt to call_llm_structured)
+    """
+    system_prompt = "\n\n".join(part for part in (schema_desc, few_shot, instructions) if part)
+    return {"system_prompt": canonical_system_prompt(system_prompt) if system_prompt else None, "prompt": content}
+
+def _build_messages(prompt: str, system_prompt: str = None, messages: List[Dict[str, str]] = None) -> List[Dict[str, str]]:
+    """
+    Build the Chat Completions messages for a prompt.
+    
+    Args:
+        prompt (str): The user prompt, sent as the last message
+        system_prompt (str, optional): Instructions sent as the first message
+        messages (List[Dict[str, str]], optional): Earlier conversation turns, sent in between
+        
+    Returns:
+        List[Dict[str, str]]: The messages to send
+    """
+    messages = list(messages or []) + [{"role": "user", "content": prompt}]
+    if system_prompt:
+        messages.insert(0, {"role": "system", "content": canonical_system_prompt(system_prompt)})
+    return messages
+
+def _prepare_chat_request(prompt, model, temperature, max_tokens, system_prompt, messages) -> Tuple[list, str, str]:
+    """
+    Build the messages for a chat request and look it up in the response caches
+    (see _lookup_response).
+    
+    Returns:
+        Tuple[list, str, str]: (messages, cache key, cached response or None)
+    """
+    messages = _build_messages(prompt, system_prompt, messages)
+    cache_key, cached = _lookup_response(_chat_params(model, temperature, max_tokens, messages))
+    return messages, cache_key, cached
+
+def _chat_params(model, temperature, max_tokens, messages) -> Dict[str, Any]:
+    """
+    Collect the chat request parameters that make up its response cache key.
+    """
+    return {"model": model, "temperature": temperature, "max_tokens": max_tokens, "messages": messages}
+
+def get_cached_response(prompt, model="gpt-4o", temperature=0.7, max_tokens=1000, system_prompt=None,
+                        messages=None) -> Optional[str]:
+    """
+    Look up the cached response to a call_llm request without sending it.
+    
+    Args:
+        prompt, model, temperature, max_tokens, system_prompt, messages: The request, as passed to call_llm
+        
+    Returns:
+        Optional[str]: The cached response, or None on a cache miss or if no cache applies to the request
+    """
+    return _prepare_chat_request(prompt, model, temperature, max_tokens, system_prompt, messages)[2]
+
+def cache_response(response, prompt, model="gpt-4o", temperature=0.7, max_tokens=1000, system_prompt=None,
+                   messages=None):
+    """
+    Store a response obtained some other way, such as one topic's part of a batched reply,
+    as the response to a call_llm request, so that request is served from the cache.
+    
+    Args:
+        response (str): The response to store
+        prompt, model, temperature, max_tokens, system_prompt, messages: The request, as passed to call_llm
+    """
+    messages = _build_messages(prompt, system_prompt, messages)
+    cache_key = llm_cache.make_request_key(_chat_params(model, temperature, max_tokens, messages))
+    _store_response(cache_key, response, temperature)
+
+def _chat_content(response, start_time: float, cache_key: str, temperature: float) -> str:
+    """
+    Log the usage of a Chat Completions response and extract its content.
+    
+    Args:
+        response: The Chat Completions response
+        start_time (float): When the call was started
+        cache_key (str): Request cache key to store the content under
+        temperature (float): The request's sampling temperature
+        
+    Returns:
+        str: The response content, or None if the response had none (e.g. a refusal); the
+            request then backs off like a failed one
+    """
+    _log_usage(response, time.time() - start_time)
+    content = response.choices[0].message.content
+    if not content:
+        llm_cache.record_failure(cache_key, LLMError(llm_cache.EMPTY_RESPONSE_ERROR))
+        return content
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Received response of length %d characters", len(content))
+    _store_response(cache_key, content, temperature)
+    return content
+
+def _missing_api_key(safe: bool) -> str:
+    """
+    Report a missing API key.
+    
+    Args:
+        safe (bool): Return the error string instead of raising
+        
+    Returns:
+        str: The error string
+        
+    Raises:
+        LLMAuthError: If safe is False
+    """
+    logger.error("OpenAI API key not found in environment variables")
+    if not safe:
+        raise LLMAuthError("Error: OpenAI API key not found in environment variables.")
+    return "Error: OpenAI API key not found in environment variables."
+
+def _api_error_result(api_error: Exception, start_time: float, safe: bool, cache_key: str) -> str:
+    """
+    Log a failed API call, start the request's failure backoff and convert the exception
+    into the helpers' error result.
+    
+    Args:
+        api_error (Exception): The exception raised by the call
+        start_time (float): When the call was started
+        safe (bool): Return the error string instead of raising
+        cache_key (str): The request's cache key, under which the failure is recorded
+        
+    Returns:
+        str: The error string, as built by _format_api_error
+        
+    Raises:
+        LLMError: If safe is False
+    """
+    elapsed = time.time() - start_time
+    logger.error("OpenAI API error after %.2f seconds: %s", elapsed, api_error)
+    llm_error = _to_llm_error(api_error, elapsed)
+    llm_cache.record_failure(cache_key, llm_error, llm_error.retry_after)
+    if not safe:
+        raise llm_error from api_error
+    return str(llm_error)
+
+def _backoff_result(cache_key: str, safe: bool) -> Optional[str]:
+    """
+    Report a request that failed recently and is still backing off (see llm_cache.get_failure)
+    the same way as the failure itself, without sending it again.
+    
+    Args:
+        cache_key (str): The request's cache key
+        safe (bool): Return the error string instead of raising
+        
+    Returns:
+        Optional[str]: The error string of the recent failure, or None if the request may be sent
+        
+    Raises:
+        LLMError: If safe is False and the request is backing off
+    """
+    error = llm_cache.get_failure(cache_key)
+    if error is None:
+        return None
+    if not safe:
+        raise type(error)(str(error), retry_after=error.retry_after)
+    return str(error)
+
+@lru_cache(maxsize=16)
+def get_encoding(model: str):
+    """
+    Load the tokenizer for a model once per process.
+    
+    Args:
+        model (str): The model name
+        
+    Returns:
+        tiktoken.Encoding: The model's tokenizer (cl100k_base for models tiktoken does not
+            know), or None if tiktoken is unavailable
+    """
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("Tokenizer unavailable for %s: %s", model, e)
+        return None
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """
+    Count the tokens in a text before sending it, e.g. to check it against a budget.
+    
+    Args:
+        text (str): The text to count
+        model (str): The model whose tokenizer to use (default: gpt-4o)
+        
+    Returns:
+        int: The number of tokens; estimated from the text length if tiktoken is unavailable
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN_ESTIMATE)
+    return len(encoding.encode(text))
+
+def call_llm(prompt, model="gpt-4o", temperature=0.7, max_tokens=1000, timeout=60, system_prompt=None, messages=None,
+             safe=True):
     """
     Calls an LLM API with the given prompt and returns the response.
     
@@ -20,76 +755,207 @@ def call_llm(prompt, model="gpt-4o", temperature=0.7, max_tokens=1000, timeout=6
         temperature (float): Controls randomness (0.0-1.0)
         max_tokens (int): Maximum number of tokens to generate
         timeout (int): Maximum time to wait for a response in seconds
+        system_prompt (str, optional): Instructions sent as a system message ahead of the prompt.
+            Keeping invariant instructions here lets the provider reuse its cached prompt prefix;
+            OpenAI only caches prompts of at least 1024 tokens, so the shared part should come first
+        messages (List[Dict[str, str]], optional): Earlier conversation turns to send before the prompt
+        safe (bool): Return failures as strings starting with "Error" (the default) instead of
+            raising LLMError
         
     Returns:
-        str: The LLM's response
+        str: The LLM's response. A request that failed recently is not resent until its backoff
+            expires (see llm_cache); its error is reported again instead
+        
+    Raises:
+        LLMError: If safe is False and the call fails; LLMTimeout, LLMRateLimit and
+            LLMAuthError identify the failures callers may want to handle differently
     """
-    # Get API key from environment variable
-    api_key = os.environ.get("OPENAI_API_KEY")
+    messages, cache_key, cached = _prepare_chat_request(prompt, model, temperature, max_tokens, system_prompt, messages)
+    if cached is not None:
+        return cached
+    failure = _backoff_result(cache_key, safe)
+    if failure is not None:
+        return failure
     
+    api_key = _api_key()
     if not api_key:
-        logging.error("OpenAI API key not found in environment variables")
-        return "Error: OpenAI API key not found in environment variables."
+        return _missing_api_key(safe)
     
     # Log API key first few and last few characters for debugging
-    masked_key = f"{api_key[:5]}...{api_key[-5:]}"
-    logging.debug(f"Using API key: {masked_key}")
+    logger.debug("Using API key: %s...%s", api_key[:5], api_key[-5:])
     
-    # Initialize the OpenAI client
+    start_time = time.time()
+    logger.debug("Starting OpenAI API call to model %s", model)
     try:
-        client = OpenAI(
-            api_key=api_key
+        client = _get_client(api_key)
+        response = _with_retries(
+            client.chat.completions.create,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout
         )
+    except Exception as api_error:
+        return _api_error_result(api_error, start_time, safe, cache_key)
+    return _chat_content(response, start_time, cache_key, temperature)
+
+
+async def acall_llm(prompt, model="gpt-4o", temperature=0.7, max_tokens=1000, timeout=60, system_prompt=None,
+                    messages=None, safe=True):
+    """
+    Async counterpart of call_llm. Calls made on the same event loop share one client and
+    connection pool, so independent prompts can be sent together, e.g.
+    await asyncio.gather(*(acall_llm(p) for p in prompts)).
+    
+    Args:
+        prompt (str): The prompt to send to the LLM
+        model (str): The model to use (default: gpt-4o)
+        temperature (float): Controls randomness (0.0-1.0)
+        max_tokens (int): Maximum number of tokens to generate
+        timeout (int): Maximum time to wait for a response in seconds
+        system_prompt (str, optional): Instructions sent as a system message ahead of the prompt
+        messages (List[Dict[str, str]], optional): Earlier conversation turns to send before the prompt
+        safe (bool): Return failures as strings starting with "Error" (the default) instead of
+            raising LLMError
         
-        # Make the API call with proper timeout handling
-        start_time = time.time()
-        logging.debug(f"Starting OpenAI API call to model {model}")
+    Returns:
+        str: The LLM's response
         
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                max_tokens=max_tokens,
-                timeout=timeout
-            )
-            
-            # Calculate and log response time
-            elapsed = time.time() - start_time
-            logging.debug(f"OpenAI API call completed in {elapsed:.2f} seconds")
-            
-            # Extract and return the response content
-            content = response.choices[0].message.content
-            logging.debug(f"Received response of length {len(content)} characters")
-            return content
-            
-        except Exception as api_error:
-            elapsed = time.time() - start_time
-            logging.error(f"OpenAI API error after {elapsed:.2f} seconds: {str(api_error)}")
-            
-            # Handle specific error types
-            error_message = str(api_error).lower()
-            if "timeout" in error_message:
-                return f"Error: LLM API call timed out after {elapsed:.1f} seconds."
-            elif "rate limit" in error_message:
-                return "Error: Rate limit exceeded. Please try again later."
-            elif "invalid auth" in error_message or "authentication" in error_message:
-                return "Error: Authentication failed. Please check your API key."
-            else:
-                return f"Error calling LLM API: {str(api_error)}"
-                
-    except Exception as e:
-        logging.exception("Unexpected error initializing OpenAI client")
-        return f"Error initializing OpenAI client: {str(e)}"
+    Raises:
+        LLMError: If safe is False and the call fails (see call_llm)
+    """
+    messages, cache_key, cached = _prepare_chat_request(prompt, model, temperature, max_tokens, system_prompt, messages)
+    if cached is not None:
+        return cached
+    failure = _backoff_result(cache_key, safe)
+    if failure is not None:
+        return failure
+    
+    api_key = _api_key()
+    if not api_key:
+        return _missing_api_key(safe)
+    
+    start_time = time.time()
+    try:
+        client = _get_async_client(api_key)
+        response = await _with_retries_async(
+            client.chat.completions.create,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout
+        )
+    except Exception as api_error:
+        return _api_error_result(api_error, start_time, safe, cache_key)
+    return _chat_content(response, start_time, cache_key, temperature)
 
 
+def call_llm_stream(prompt, model="gpt-4o", temperature=0.7, max_tokens=1000, timeout=60,
+                    system_prompt=None, messages=None, safe=True) -> Iterator[str]:
+    """
+    Calls an LLM API with the given prompt and yields the response as it is generated.
+    
+    Args:
+        prompt (str): The prompt to send to the LLM
+        model (str): The model to use (default: gpt-4o)
+        temperature (float): Controls randomness (0.0-1.0)
+        max_tokens (int): Maximum number of tokens to generate
+        timeout (int): Maximum time to wait for a response in seconds
+        system_prompt (str, optional): Instructions sent as a system message ahead of the prompt
+        messages (List[Dict[str, str]], optional): Earlier conversation turns to send before the prompt
+        safe (bool): Report failures as a final error fragment, as returned by call_llm (the
+            default), instead of raising LLMError. A failure mid-stream then follows the
+            fragments already yielded, so callers that must tell it apart from content should
+            pass safe=False
+        
+    Yields:
+        str: Fragments of the LLM's response
+        
+    Raises:
+        LLMError: If safe is False and the call fails, including after fragments have been yielded
+    """
+    messages, cache_key, cached = _prepare_chat_request(prompt, model, temperature, max_tokens, system_prompt, messages)
+    if cached is not None:
+        yield cached
+        return
+    failure = _backoff_result(cache_key, safe)
+    if failure is not None:
+        yield failure
+        return
+    
+    api_key = _api_key()
+    if not api_key:
+        yield _missing_api_key(safe)
+        return
+    
+    start_time = time.time()
+    logger.debug("Starting streaming OpenAI API call to model %s", model)
+    
+    try:
+        client = _get_client(api_key)
+        stream = _with_retries(
+            client.chat.completions.create,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            stream=True,
+            # The final chunk then carries the token usage for the whole response
+            stream_options={"include_usage": True}
+        )
+        
+        fragments = []
+        usage_chunk = None
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                fragment = chunk.choices[0].delta.content
+                fragments.append(fragment)
+                yield fragment
+            if getattr(chunk, "usage", None) is not None:
+                usage_chunk = chunk
+        
+        elapsed = time.time() - start_time
+        logger.debug("Streaming OpenAI API call completed in %.2f seconds", elapsed)
+        if usage_chunk is not None:
+            _log_usage(usage_chunk, elapsed)
+        _store_response(cache_key, "".join(fragments), temperature)
+        
+    except Exception as api_error:
+        # A partial response is recorded as a failure rather than cached
+        yield _api_error_result(api_error, start_time, safe, cache_key)
+
+
+@lru_cache(maxsize=64)
+def _format_block(schema_key: str) -> Dict[str, Any]:
+    """
+    Build the Responses API text format for a JSON schema, once per distinct schema.
+    
+    Args:
+        schema_key (str): The schema as canonical JSON (sorted keys)
+        
+    Returns:
+        Dict[str, Any]: The shared text parameter for responses.create; it must not be modified
+    """
+    return {
+        "format": {
+            "type": "json_schema",
+            "name": "structured_output",
+            "schema": json_utils.loads(schema_key),
+            "strict": True
+        }
+    }
+
 def call_llm_structured(schema: Dict[str, Any], 
                     system_prompt: str = None,
                     user_prompt: str = None,
                     messages: List[Dict[str, str]] = None,
                     model: str = "gpt-4o", 
                     temperature: float = 0.7, 
-                    timeout: int = 60) -> Dict[str, Any]:
+                    timeout: int = 60,
+                    safe: bool = True) -> Dict[str, Any]:
     """
     Calls an LLM API with structured output capabilities using the OpenAI Responses API.
     
@@ -101,89 +967,230 @@ def call_llm_structured(schema: Dict[str, Any],
         model (str): The model to use (default: gpt-4o)
         temperature (float): Controls randomness (0.0-1.0)
         timeout (int): Maximum time to wait for a response in seconds
+        safe (bool): Return failures as {"error": message} (the default) instead of raising LLMError
         
     Returns:
         Dict[str, Any]: Structured response following the provided schema
+        
+    Raises:
+        LLMError: If safe is False and the call fails (see call_llm)
     """
     # Get API key from environment variable
-    api_key = os.environ.get("OPENAI_API_KEY")
+    api_key = _api_key()
     
     if not api_key:
-        logging.error("OpenAI API key not found in environment variables")
+        logger.error("OpenAI API key not found in environment variables")
+        if not safe:
+            raise LLMAuthError("OpenAI API key not found in environment variables.")
         return {"error": "OpenAI API key not found in environment variables."}
     
     # Initialize the OpenAI client
     try:
-        client = OpenAI(
-            api_key=api_key
-        )
+        client = _get_client(api_key)
         
         # Prepare messages if not provided directly
         if messages is None:
             messages = []
             if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
+                messages.append({"role": "system", "content": canonical_system_prompt(system_prompt)})
             if user_prompt:
                 messages.append({"role": "user", "content": user_prompt})
         
         # Make sure we have at least one message
         if not messages:
-            logging.error("No messages provided for structured output call")
+            logger.error("No messages provided for structured output call")
+            if not safe:
+                raise LLMError("No messages provided for the API call.")
             return {"error": "No messages provided for the API call."}
         
+        # Canonical encoding of the schema, used to reuse its format block and in the cache key
+        schema_key = json_utils.dumps(schema, sort_keys=True)
+        
+        # Serve repeated requests from the response caches; the raw text is cached, so every
+        # hit returns a freshly parsed dict the caller is free to modify
+        cache_key, cached = _lookup_response({
+            "model": model, "temperature": temperature, "messages": messages, "schema": schema_key
+        })
+        if cached is not None:
+            return json_utils.loads(cached)
+        failure = _backoff_result(cache_key, safe)
+        if failure is not None:
+            return {"error": failure}
+        
         # Make the API call with proper timeout handling
         start_time = time.time()
-        logging.debug(f"Starting OpenAI Responses API call to model {model} with structured output")
+        logger.debug("Starting OpenAI Responses API call to model %s with structured output", model)
         
         try:
-            response = client.responses.create(
+            response = _with_retries(
+                client.responses.create,
                 model=model,
                 input=messages,
-                text={
-                    "format": {
-                        "type": "json_schema",
-                        "name": "structured_output",
-                        "schema": schema,
-                        "strict": True
-                    }
-                },
+                text=_format_block(schema_key),
                 temperature=temperature,
                 timeout=timeout
             )
             
-            # Calculate and log response time
+            # Calculate and log response time and token usage
             elapsed = time.time() - start_time
-            logging.debug(f"OpenAI Responses API call completed in {elapsed:.2f} seconds")
+            _log_usage(response, elapsed)
             
             # Parse and return the JSON response
             try:
-                structured_output = json.loads(response.output_text)
-                logging.debug(f"Successfully parsed structured response")
+                structured_output = json_utils.loads(response.output_text)
+                logger.debug("Successfully parsed structured response")
+                _store_response(cache_key, response.output_text, temperature)
                 return structured_output
             except json.JSONDecodeError as json_err:
-                logging.error(f"Failed to parse JSON response: {str(json_err)}")
+                logger.error("Failed to parse JSON response: %s", json_err)
+                if not safe:
+                    raise LLMError(f"Failed to parse JSON response: {str(json_err)}") from json_err
                 return {"error": f"Failed to parse JSON response: {str(json_err)}"}
             
+        except LLMError:
+            raise
         except Exception as api_error:
             elapsed = time.time() - start_time
-            logging.error(f"OpenAI API error after {elapsed:.2f} seconds: {str(api_error)}")
+            logger.error("OpenAI API error after %.2f seconds: %s", elapsed, api_error)
             
-            # Handle specific error types
-            error_message = str(api_error).lower()
-            if "timeout" in error_message:
-                return {"error": f"LLM API call timed out after {elapsed:.1f} seconds."}
-            elif "rate limit" in error_message:
-                return {"error": "Rate limit exceeded. Please try again later."}
-            elif "invalid auth" in error_message or "authentication" in error_message:
-                return {"error": "Authentication failed. Please check your API key."}
-            else:
-                return {"error": f"Error calling LLM API: {str(api_error)}"}
+            llm_error = _to_llm_error(api_error, elapsed)
+            llm_cache.record_failure(cache_key, llm_error, llm_error.retry_after)
+            if not safe:
+                raise llm_error from api_error
+            message = _describe_api_error(api_error, elapsed)
+            return {"error": message or f"Error calling LLM API: {str(api_error)}"}
                 
+    except LLMError:
+        raise
     except Exception as e:
-        logging.exception("Unexpected error initializing OpenAI client")
+        logger.exception("Unexpected error initializing OpenAI client")
+        if not safe:
+            raise LLMError(f"Error initializing OpenAI client: {str(e)}") from e
         return {"error": f"Error initializing OpenAI client: {str(e)}"}
 
 
+async def iter_submit_many(requests: List[Dict[str, Any]], concurrency: int = 16) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Sends many LLM requests concurrently through acall_llm, over the event loop's shared
+    async client, yielding each response as soon as it arrives.
+    
+    Args:
+        requests (List[Dict[str, Any]]): One dict per request, each with a "prompt" key and
+            optionally "system_prompt", "model", "temperature", "max_tokens" and "timeout"
+        concurrency (int): Maximum number of requests in flight at once
+        
+    Yields:
+        Tuple[int, str]: (request index, LLM response or error string as returned by call_llm),
+            in completion order
+    """
+    if not requests:
+        return
+    
+    api_key = _api_key()
+    
+    if not api_key:
+        logger.error("OpenAI API key not found in environment variables")
+        for i in range(len(requests)):
+            yield i, "Error: OpenAI API key not found in environment variables."
+        return
+    
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    # Group requests by system prompt, so requests sharing a prefix are dispatched back to back
+    groups = {}
+    for i, request in enumerate(requests):
+        groups.setdefault(request.get("system_prompt"), []).append(i)
+    
+    async def submit(i, request):
+        async with semaphore:
+            return i, await acall_llm(**request)
+    
+    # Tasks are created in group order, so that is the order they take the semaphore in
+    tasks = [asyncio.ensure_future(submit(i, requests[i])) for indices in groups.values() for i in indices]
+    
+    logger.debug("Submitting %d OpenAI API calls in %d prompt groups with concurrency %d", len(requests), len(groups), concurrency)
+    try:
+        for completed in asyncio.as_completed(tasks):
+            yield await completed
+    finally:
+        # A caller that stops iterating early leaves requests in flight; cancel them rather
+        # than leaving them pending when the loop shuts down
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def submit_many(requests: List[Dict[str, Any]], concurrency: int = 16) -> List[str]:
+    """
+    Sends many LLM requests concurrently over a single async client.
+    
+    Args:
+        requests (List[Dict[str, Any]]): Request dicts as accepted by iter_submit_many
+        concurrency (int): Maximum number of requests in flight at once
+        
+    Returns:
+        List[str]: The LLM responses (or error strings, as returned by call_llm), in request order
+    """
+    responses = [None] * len(requests)
+    async for i, response in iter_submit_many(requests, concurrency):
+        responses[i] = response
+    return responses
+
+
+def call_llm_many(requests: List[Dict[str, Any]], concurrency: int = 16) -> List[str]:
+    """
+    Synchronous wrapper around submit_many for callers outside an event loop.
+    
+    Args:
+        requests (List[Dict[str, Any]]): Request dicts as accepted by submit_many
+        concurrency (int): Maximum number of requests in flight at once
+        
+    Returns:
+        List[str]: The LLM responses, in request order
+        
+    Raises:
+        RuntimeError: If called while an event loop is running; await submit_many instead
+    """
+    if not requests:
+        return []
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_submit_many_and_close(requests, concurrency))
+    raise RuntimeError("call_llm_many cannot be called from a running event loop; await submit_many instead")
+
+
+async def _submit_many_and_close(requests: List[Dict[str, Any]], concurrency: int) -> List[str]:
+    """
+    Run submit_many, then close the async client it used before the event loop goes away.
+    """
+    try:
+        return await submit_many(requests, concurrency)
+    finally:
+        await close_async_client()
+
+
+def call_llm_batch(prompts: List[str], concurrency: int = 8, **kwargs) -> List[str]:
+    """
+    Calls the LLM once per prompt, sending the calls concurrently.
+    
+    Args:
+        prompts (List[str]): The prompts to send
+        concurrency (int): Maximum number of requests in flight at once
+        **kwargs: Request options applied to every prompt ("system_prompt", "model",
+            "temperature", "max_tokens", "timeout")
+        
+    Returns:
+        List[str]: The LLM responses (or error strings, as returned by call_llm), in prompt order
+    """
+    return call_llm_many([dict(kwargs, prompt=prompt) for prompt in prompts], concurrency)
+
+
+if PREWARM_ENABLED:
+    prewarm_connection()
+
+
 if __name__ == "__main__":
     # Configure logging for testing
     logging.basicConfig(level=logging.DEBUG)
@@ -1,20 +1,142 @@
 """
 Utility function to extract metadata from YouTube videos.
 """
+import re
 import requests
 import json
 import os
 from datetime import datetime
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def extract_youtube_metadata(video_id):
+# Connect and read timeouts for YouTube Data API requests, in seconds
+REQUEST_TIMEOUT = (3.05, 10)
+
+@lru_cache(maxsize=1)
+def _get_session() -> requests.Session:
     """
-    Extracts metadata from a YouTube video using the YouTube Data API.
+    Get the HTTP session used for YouTube Data API requests, creating it on first use.
+    
+    The session keeps connections to googleapis.com alive between requests, so metadata
+    lookups after the first skip the TCP and TLS handshakes; transient failures (rate
+    limiting and server errors) are retried with backoff.
+    
+    Returns:
+        requests.Session: The shared session
+    """
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry))
+    return session
+
+# ISO 8601 durations as returned by the API, e.g. "PT1H2M3S", "PT45S" or "P1DT2H"
+DURATION_PATTERN = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
+# The videos.list endpoint accepts at most this many comma-separated IDs per request
+MAX_IDS_PER_REQUEST = 50
+
+def _parse_iso8601_duration(duration_iso):
+    """
+    Split an ISO 8601 video duration into hours, minutes and seconds.
     
     Args:
-        video_id (str): The YouTube video ID
+        duration_iso (str): The duration, e.g. "PT1H2M3S" (days, as in "P1DT2H", are
+            counted as hours)
         
     Returns:
-        dict: A dictionary containing video metadata (title, channel, duration, etc.)
+        tuple: (hours, minutes, seconds); zeros if the duration cannot be parsed
+    """
+    match = DURATION_PATTERN.match(duration_iso)
+    if match is None:
+        return 0, 0, 0
+    days, hours, minutes, seconds = (int(group) if group else 0 for group in match.groups())
+    return days * 24 + hours, minutes, seconds
+
+def _format_duration(hours, minutes, seconds):
+    """
+    Format a duration as human-readable text, e.g. "1 hour 2 minutes 3 seconds".
+    
+    Args:
+        hours (int): Hours
+        minutes (int): Minutes
+        seconds (int): Seconds
+        
+    Returns:
+        str: The formatted duration
+    """
+    duration_str = ""
+    if hours > 0:
+        duration_str += f"{hours} hour{'s' if hours > 1 else ''} "
+    if minutes > 0:
+        duration_str += f"{minutes} minute{'s' if minutes > 1 else ''} "
+    if seconds > 0 or (hours == 0 and minutes == 0):
+        duration_str += f"{seconds} second{'s' if seconds > 1 else ''}"
+    return duration_str
+
+def _format_published(published_at):
+    """
+    Format the API's publishedAt timestamp as a date such as "January 02, 2024".
+    
+    Args:
+        published_at (str): The timestamp, e.g. "2024-01-02T03:04:05Z"
+        
+    Returns:
+        str: The formatted date, or the input unchanged if it cannot be parsed
+    """
+    if published_at:
+        try:
+            published_date = datetime.strptime(published_at, "%Y-%m-%dT%H:%M:%SZ")
+            return published_date.strftime("%B %d, %Y")
+        except ValueError:
+            pass
+    return published_at
+
+def _build_metadata(video_data):
+    """
+    Extract the metadata dictionary from one item of a videos.list response.
+    
+    Args:
+        video_data (dict): The API item for the video
+        
+    Returns:
+        dict: The video metadata
+    """
+    snippet = video_data.get("snippet", {})
+    content_details = video_data.get("contentDetails", {})
+    statistics = video_data.get("statistics", {})
+    
+    # Format the duration (ISO 8601 format to human-readable)
+    hours, minutes, seconds = _parse_iso8601_duration(content_details.get("duration", "PT0S"))
+    
+    return {
+        "video_id": video_data["id"],
+        "title": snippet.get("title", "Unknown Title"),
+        "description": snippet.get("description", ""),
+        "channel_name": snippet.get("channelTitle", "Unknown Channel"),
+        "channel_id": snippet.get("channelId", ""),
+        "published_at": _format_published(snippet.get("publishedAt", "")),
+        "duration": _format_duration(hours, minutes, seconds),
+        "duration_seconds": hours * 3600 + minutes * 60 + seconds,
+        "view_count": int(statistics.get("viewCount", 0)),
+        "like_count": int(statistics.get("likeCount", 0)),
+        "comment_count": int(statistics.get("commentCount", 0)),
+        "thumbnail_url": snippet.get("thumbnails", {}).get("high", {}).get("url", ""),
+        "tags": snippet.get("tags", []),
+        "category_id": snippet.get("categoryId", ""),
+    }
+
+def extract_youtube_metadata_batch(video_ids):
+    """
+    Extracts metadata for several YouTube videos, fetching up to 50 videos per
+    YouTube Data API request.
+    
+    Args:
+        video_ids (list): The YouTube video IDs
+        
+    Returns:
+        dict: Video ID -> metadata dictionary, as returned by extract_youtube_metadata
+            (including the "error" dictionaries for videos that could not be fetched)
     """
     # In a production environment, you would use an API key from environment variables
     # For this example, we'll use a placeholder
@@ -24,104 +146,72 @@ def extract_youtube_metadata(video_id):
     # Base URL for YouTube Data API v3
     base_url = "https://www.googleapis.com/youtube/v3/videos"
     
-    # Parameters for the API request
-    params = {
-        "part": "snippet,contentDetails,statistics",
-        "id": video_id,
-        "key": api_key
-    }
-    
-    try:
-        # Make the API request
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        
-        # Parse the JSON response
-        data = response.json()
+    results = {}
+    for i in range(0, len(video_ids), MAX_IDS_PER_REQUEST):
+        chunk = video_ids[i:i + MAX_IDS_PER_REQUEST]
         
-        # Check if the video exists
-        if not data.get("items"):
-            return {
-                "error": "Video not found or API key invalid",
-                "video_id": video_id
-            }
-        
-        # Extract relevant metadata
-        video_data = data["items"][0]
-        snippet = video_data.get("snippet", {})
-        content_details = video_data.get("contentDetails", {})
-        statistics = video_data.get("statistics", {})
-        
-        # Format the duration (ISO 8601 format to human-readable)
-        duration_iso = content_details.get("duration", "PT0S")
-        # Simple conversion for common formats (not handling all ISO 8601 cases)
-        hours = 0
-        minutes = 0
-        seconds = 0
+        # Parameters for the API request
+        params = {
+            "part": "snippet,contentDetails,statistics",
+            "id": ",".join(chunk),
+            "key": api_key
+        }
         
-        if "H" in duration_iso:
-            hours = int(duration_iso.split("H")[0].split("PT")[1])
-            duration_iso = duration_iso.split("H")[1]
-        elif "PT" in duration_iso:
-            duration_iso = duration_iso.split("PT")[1]
+        try:
+            # Make the API request
+            response = _get_session().get(base_url, params=params, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()  # Raise an exception for HTTP errors
             
-        if "M" in duration_iso:
-            minutes = int(duration_iso.split("M")[0])
-            duration_iso = duration_iso.split("M")[1]
+            # Parse the JSON response and index the videos by ID
+            for video_data in response.json().get("items", []):
+                try:
+                    results[video_data["id"]] = _build_metadata(video_data)
+                except (KeyError, ValueError) as e:
+                    # Handle parsing errors
+                    video_id = video_data.get("id")
+                    results[video_id] = {
+                        "error": f"Data parsing error: {str(e)}",
+                        "video_id": video_id
+                    }
             
-        if "S" in duration_iso:
-            seconds = int(duration_iso.split("S")[0])
-        
-        duration_str = ""
-        if hours > 0:
-            duration_str += f"{hours} hour{'s' if hours > 1 else ''} "
-        if minutes > 0:
-            duration_str += f"{minutes} minute{'s' if minutes > 1 else ''} "
-        if seconds > 0 or (hours == 0 and minutes == 0):
-            duration_str += f"{seconds} second{'s' if seconds > 1 else ''}"
+        except requests.exceptions.RequestException as e:
+            # Handle request errors
+            for video_id in chunk:
+                results[video_id] = {
+                    "error": f"API request error: {str(e)}",
+                    "video_id": video_id
+                }
+            continue
+        except (KeyError, ValueError, json.JSONDecodeError) as e:
+            # Handle parsing errors
+            for video_id in chunk:
+                results[video_id] = {
+                    "error": f"Data parsing error: {str(e)}",
+                    "video_id": video_id
+                }
+            continue
         
-        # Format the published date
-        published_at = snippet.get("publishedAt", "")
-        if published_at:
-            try:
-                published_date = datetime.strptime(published_at, "%Y-%m-%dT%H:%M:%SZ")
-                published_at = published_date.strftime("%B %d, %Y")
-            except ValueError:
-                pass
-        
-        # Construct the metadata dictionary
-        metadata = {
-            "video_id": video_id,
-            "title": snippet.get("title", "Unknown Title"),
-            "description": snippet.get("description", ""),
-            "channel_name": snippet.get("channelTitle", "Unknown Channel"),
-            "channel_id": snippet.get("channelId", ""),
-            "published_at": published_at,
-            "duration": duration_str,
-            "duration_seconds": hours * 3600 + minutes * 60 + seconds,
-            "view_count": int(statistics.get("viewCount", 0)),
-            "like_count": int(statistics.get("likeCount", 0)),
-            "comment_count": int(statistics.get("commentCount", 0)),
-            "thumbnail_url": snippet.get("thumbnails", {}).get("high", {}).get("url", ""),
-            "tags": snippet.get("tags", []),
-            "category_id": snippet.get("categoryId", ""),
-        }
-        
-        return metadata
-        
-    except requests.exceptions.RequestException as e:
-        # Handle request errors
-        return {
-            "error": f"API request error: {str(e)}",
-            "video_id": video_id
-        }
-    except (KeyError, ValueError, json.JSONDecodeError) as e:
-        # Handle parsing errors
-        return {
-            "error": f"Data parsing error: {str(e)}",
-            "video_id": video_id
-        }
+        # Videos missing from the response do not exist (or the API key is invalid)
+        for video_id in chunk:
+            if video_id not in results:
+                results[video_id] = {
+                    "error": "Video not found or API key invalid",
+                    "video_id": video_id
+                }
+    
+    return results
 
+def extract_youtube_metadata(video_id):
+    """
+    Extracts metadata from a YouTube video using the YouTube Data API.
+    
+    Args:
+        video_id (str): The YouTube video ID
+        
+    Returns:
+        dict: A dictionary containing video metadata (title, channel, duration, etc.)
+    """
+    return extract_youtube_metadata_batch([video_id])[video_id]
 
 if __name__ == "__main__":
     # Test the function with an example video ID
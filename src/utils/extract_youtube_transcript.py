@@ -40,7 +40,9 @@ def extract_youtube_transcript(video_id):
                 text = segment['text']
             else:
                 # Handle FetchedTranscriptSnippet objects
-                text = segment.text if hasattr(segment, 'text') else str(segment)
+                text = getattr(segment, 'text', None)
+                if text is None:
+                    text = str(segment)
                 
             # Add a space if the text doesn't end with punctuation
             if text and text[-1] not in '.!?':
@@ -9,13 +9,9 @@ Uses OpenAI's structured output capabilities to ensure consistent formatting.
 import json
 from typing import Dict, List, Any, Optional
 from pydantic import BaseModel, Field
-from openai import OpenAI
-from .call_llm import call_llm
+from .call_llm import call_llm_structured
 from src.utils.logger import logger
 
-# Initialize OpenAI client
-client = OpenAI()
-
 # Define Pydantic models for Q&A pairs
 class QAPair(BaseModel):
     """Model for a question and answer pair"""
@@ -45,49 +41,38 @@ def generate_qa_pairs(topic: str, transcript: str, num_pairs: int = 3) -> List[D
     transcript_sample = transcript[:5000] if len(transcript) > 5000 else transcript
     
     try:
-        # Use OpenAI's Responses API with structured output
-        response = client.responses.create(
-            model="gpt-4o",
-            input=[
-                {"role": "system", "content": f"You are an expert educational content creator. Focus specifically on the topic '{topic}'. Generate {num_pairs} insightful question and answer pairs that cover key information from the transcript. Each answer should be 3-5 sentences with specific information."},
-                {"role": "user", "content": f"For the topic '{topic}', create {num_pairs} question and answer pairs based on this transcript sample:\n\n{transcript_sample}"}
-            ],
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": "topic_qa_pairs",
-                    "schema": {
-                        "type": "object",
-                        "properties": {
-                            "qa_pairs": {
-                                "type": "array",
-                                "items": {
-                                    "type": "object",
-                                    "properties": {
-                                        "question": {
-                                            "type": "string", 
-                                            "description": f"Clear, specific question about {topic}"
-                                        },
-                                        "answer": {
-                                            "type": "string",
-                                            "description": "Detailed, specific answer with information from the transcript"
-                                        }
-                                    },
-                                    "required": ["question", "answer"],
-                                    "additionalProperties": False
+        # Use the shared client's structured output call; failures raise LLMError
+        qa_results = call_llm_structured(
+            schema={
+                "type": "object",
+                "properties": {
+                    "qa_pairs": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "question": {
+                                    "type": "string", 
+                                    "description": f"Clear, specific question about {topic}"
+                                },
+                                "answer": {
+                                    "type": "string",
+                                    "description": "Detailed, specific answer with information from the transcript"
                                 }
-                            }
-                        },
-                        "required": ["qa_pairs"],
-                        "additionalProperties": False
-                    },
-                    "strict": True
-                }
-            }
+                            },
+                            "required": ["question", "answer"],
+                            "additionalProperties": False
+                        }
+                    }
+                },
+                "required": ["qa_pairs"],
+                "additionalProperties": False
+            },
+            system_prompt=f"You are an expert educational content creator. Focus specifically on the topic '{topic}'. Generate {num_pairs} insightful question and answer pairs that cover key information from the transcript. Each answer should be 3-5 sentences with specific information.",
+            user_prompt=f"For the topic '{topic}', create {num_pairs} question and answer pairs based on this transcript sample:\n\n{transcript_sample}",
+            model="gpt-4o",
+            safe=False
         )
-        
-        # Parse the structured output response
-        qa_results = json.loads(response.output_text)
         qa_pairs = qa_results.get("qa_pairs", [])
         
         # Verify we got the expected format
@@ -105,12 +90,6 @@ def generate_qa_pairs(topic: str, transcript: str, num_pairs: int = 3) -> List[D
             
     except Exception as e:
         logger.exception(f"Error generating Q&A pairs for topic {topic}: {str(e)}")
-        # If we have error details, log them
-        if hasattr(e, 'response') and hasattr(e.response, 'json'):
-            try:
-                logger.error(f"API error details: {e.response.json()}")
-            except:
-                pass
         return get_fallback_qa_pairs(topic)
 
 def generate_whole_content_qa(topics: List[str], transcript: str, num_pairs: int = 5) -> List[Dict[str, str]]:
@@ -136,49 +115,38 @@ def generate_whole_content_qa(topics: List[str], transcript: str, num_pairs: int
     topics_text = ", ".join(topics)
     
     try:
-        # Use OpenAI's Responses API with structured output
-        response = client.responses.create(
-            model="gpt-4o",
-            input=[
-                {"role": "system", "content": f"You are an expert educational content creator. Generate {num_pairs} comprehensive Q&A pairs that cover the main themes across these topics: {topics_text}. Each answer should be 4-6 sentences with specific information from the transcript."},
-                {"role": "user", "content": f"Create {num_pairs} insightful question and answer pairs for these topics based on this transcript sample:\n\n{transcript_sample}"}
-            ],
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": "qa_pairs",
-                    "schema": {
-                        "type": "object",
-                        "properties": {
-                            "qa_pairs": {
-                                "type": "array",
-                                "items": {
-                                    "type": "object",
-                                    "properties": {
-                                        "question": {
-                                            "type": "string", 
-                                            "description": "Clear, specific question about important themes in the video"
-                                        },
-                                        "answer": {
-                                            "type": "string",
-                                            "description": "Detailed, comprehensive answer with specific information from the transcript"
-                                        }
-                                    },
-                                    "required": ["question", "answer"],
-                                    "additionalProperties": False
+        # Use the shared client's structured output call; failures raise LLMError
+        qa_results = call_llm_structured(
+            schema={
+                "type": "object",
+                "properties": {
+                    "qa_pairs": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "question": {
+                                    "type": "string", 
+                                    "description": "Clear, specific question about important themes in the video"
+                                },
+                                "answer": {
+                                    "type": "string",
+                                    "description": "Detailed, comprehensive answer with specific information from the transcript"
                                 }
-                            }
-                        },
-                        "required": ["qa_pairs"],
-                        "additionalProperties": False
-                    },
-                    "strict": True
-                }
-            }
+                            },
+                            "required": ["question", "answer"],
+                            "additionalProperties": False
+                        }
+                    }
+                },
+                "required": ["qa_pairs"],
+                "additionalProperties": False
+            },
+            system_prompt=f"You are an expert educational content creator. Generate {num_pairs} comprehensive Q&A pairs that cover the main themes across these topics: {topics_text}. Each answer should be 4-6 sentences with specific information from the transcript.",
+            user_prompt=f"Create {num_pairs} insightful question and answer pairs for these topics based on this transcript sample:\n\n{transcript_sample}",
+            model="gpt-4o",
+            safe=False
         )
-        
-        # Parse the structured output response
-        qa_results = json.loads(response.output_text)
         qa_pairs = qa_results.get("qa_pairs", [])
         
         # Verify we got the expected format
@@ -196,12 +164,6 @@ def generate_whole_content_qa(topics: List[str], transcript: str, num_pairs: int
             
     except Exception as e:
         logger.exception(f"Error generating comprehensive Q&A pairs: {str(e)}")
-        # If we have error details, log them
-        if hasattr(e, 'response') and hasattr(e.response, 'json'):
-            try:
-                logger.error(f"API error details: {e.response.json()}")
-            except:
-                pass
         return get_fallback_comprehensive_qa(topics)
 
 def get_fallback_qa_pairs(topic: str) -> List[Dict[str, str]]:
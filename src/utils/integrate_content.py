@@ -70,12 +70,9 @@ def integrate_content(
     except Exception as e:
         logger.error(f"Failed to integrate content: {str(e)}")
         # Fallback: concatenate the transformed content with simple transitions
-        fallback_content = ""
-        for i, topic in enumerate(topics):
-            if topic in transformed_content:
-                if i > 0:
-                    fallback_content += "\n\n"
-                fallback_content += transformed_content[topic]
+        fallback_content = "\n\n".join(
+            transformed_content[topic] for topic in topics if topic in transformed_content
+        )
         
         logger.warning(f"Using fallback integration method ({len(fallback_content)} characters)")
         return fallback_content
@@ -0,0 +1,42 @@
+"""
+JSON helpers that use orjson when it is installed and fall back to the standard library.
+
+orjson parses and serializes noticeably faster than the json module on the
+LLM-sized payloads handled in the pipeline. Its decode errors subclass
+json.JSONDecodeError, so callers can keep catching that exception.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads(data):
+    """
+    Parse a JSON document.
+    
+    Args:
+        data (str | bytes): The JSON document
+    
+    Returns:
+        Any: The parsed value
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj, sort_keys=False):
+    """
+    Serialize a value to a compact JSON string.
+    
+    Args:
+        obj (Any): The value to serialize
+        sort_keys (bool): Whether to sort object keys, for deterministic output
+    
+    Returns:
+        str: The JSON document
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0).decode("utf-8")
+    return json.dumps(obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False)
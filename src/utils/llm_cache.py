@@ -0,0 +1,199 @@
+"""
+Persistent cache of LLM responses.
+
+Re-running the pipeline on the same video rebuilds exactly the same requests, so the
+call_llm helpers store responses in a small SQLite database keyed by a hash of the full
+request (see make_request_key) and serve them from there instead of repeating the LLM
+round-trip.
+
+Failed requests are remembered in memory, under the same key, for a short backoff
+window that grows with each consecutive failure or follows the server's Retry-After,
+so a request that keeps failing (content policy, oversized prompt, rate limiting) is
+not re-sent over and over within a session.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional
+from src.utils import json_utils
+from src.utils.logger import logger
+
+# Caching is opt-in: set LLM_CACHE_PATH (e.g. cache/llm_cache.sqlite) to enable it. Relative
+# paths are resolved against the project root, so the location does not depend on the CWD
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", "")
+if LLM_CACHE_PATH and not os.path.isabs(LLM_CACHE_PATH):
+    LLM_CACHE_PATH = str(Path(__file__).resolve().parents[2] / LLM_CACHE_PATH)
+
+# Cached responses older than this are treated as misses; transformation prompts are sampled
+# (temperature 0.7), so a cached response is only a reusable answer, not the answer
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# Backoff window for a failed request; it doubles with each consecutive failure up to the
+# maximum, unless the failure carries the server's own retry delay
+FAILURE_TTL_SECONDS = 30
+MAX_FAILURE_TTL_SECONDS = 300
+
+# Recorded as the failure when the LLM returns no content (e.g. a refusal)
+EMPTY_RESPONSE_ERROR = "Error: The LLM returned an empty response."
+
+# Database path -> open connection (None if it could not be opened)
+_connections = {}
+_lock = threading.Lock()
+
+# Cache key -> (time of the last failure, backoff window in seconds, consecutive failure count, error)
+_failures = {}
+
+def _get_connection(path: str = LLM_CACHE_PATH):
+    """
+    Open a cache database on first use.
+
+    Args:
+        path (str): The database file
+
+    Returns:
+        sqlite3.Connection: The shared connection, or None if caching is disabled or unavailable
+    """
+    if not path:
+        return None
+    with _lock:
+        if path not in _connections:
+            _connections[path] = _open_connection(path)
+        return _connections[path]
+
+def _open_connection(path: str):
+    """
+    Create the cache directory and database table.
+
+    Args:
+        path (str): The database file
+
+    Returns:
+        sqlite3.Connection: The new connection, or None if the database cannot be opened
+    """
+    try:
+        cache_dir = os.path.dirname(path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        connection = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets concurrent pipeline runs read the cache while another writes to it
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses (hash TEXT PRIMARY KEY, response TEXT NOT NULL, ts REAL NOT NULL)"
+        )
+        connection.commit()
+        logger.debug(f"LLM response cache opened: {path}")
+        return connection
+    except sqlite3.Error as e:
+        logger.warning(f"LLM response cache unavailable, continuing without it: {str(e)}")
+        return None
+
+def lookup(key: str, path: str = LLM_CACHE_PATH) -> str:
+    """
+    Look up a cached response by key.
+
+    Args:
+        key (str): The cache key
+        path (str): The cache database
+
+    Returns:
+        str: The cached response, or None on a cache miss, if it has expired or if the cache is disabled
+    """
+    connection = _get_connection(path)
+    if connection is None:
+        return None
+
+    with _lock:
+        row = connection.execute(
+            "SELECT response FROM responses WHERE hash = ? AND ts >= ?", (key, time.time() - CACHE_TTL_SECONDS)
+        ).fetchone()
+    if row is None:
+        return None
+    logger.debug(f"LLM response cache hit: {key[:12]}")
+    return row[0]
+
+def store(key: str, response: str, path: str = LLM_CACHE_PATH):
+    """
+    Store a response by key.
+
+    Args:
+        key (str): The cache key
+        response (str): The response to store
+        path (str): The cache database
+    """
+    connection = _get_connection(path)
+    if connection is None:
+        return
+
+    with _lock:
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (hash, response, ts) VALUES (?, ?, ?)",
+            (key, response, time.time())
+        )
+        connection.commit()
+
+def make_request_key(params: dict) -> str:
+    """
+    Build the cache key for a full API request.
+
+    Args:
+        params (dict): Every request parameter that affects the response (model, sampling
+            settings, messages, schema, ...); values must be JSON-serializable
+
+    Returns:
+        str: BLAKE2b hex digest of the canonical JSON encoding of the parameters
+    """
+    return hashlib.blake2b(json_utils.dumps(params, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+
+def get_failure(key: str) -> Optional[Exception]:
+    """
+    Look up a recent failure of a request.
+
+    Args:
+        key (str): The request's cache key (see make_request_key)
+
+    Returns:
+        Optional[Exception]: The error the last attempt failed with if it is still within its
+            backoff window, otherwise None
+    """
+    with _lock:
+        failure = _failures.get(key)
+    if failure is None:
+        return None
+
+    failed_at, ttl, count, error = failure
+    if time.time() - failed_at >= ttl:
+        return None
+    logger.debug(f"Skipping request that failed {count} time(s) in the last {ttl:.0f} seconds: {key[:12]}")
+    return error
+
+def record_failure(key: str, error: Exception, retry_after: float = None):
+    """
+    Remember a failed request for its backoff window. Failures are only kept in memory,
+    so a later run retries the request.
+
+    Args:
+        key (str): The request's cache key (see make_request_key)
+        error (Exception): The error the request failed with
+        retry_after (float, optional): Seconds the server asked to wait before retrying (e.g. a 429's
+            Retry-After header); used as the backoff window instead of the exponential one
+    """
+    with _lock:
+        count = _failures[key][2] + 1 if key in _failures else 1
+        if retry_after is not None:
+            ttl = min(retry_after, MAX_FAILURE_TTL_SECONDS)
+        else:
+            ttl = min(FAILURE_TTL_SECONDS * 2 ** (count - 1), MAX_FAILURE_TTL_SECONDS)
+        _failures[key] = (time.time(), ttl, count, error)
+
+def clear_failure(key: str):
+    """
+    Forget the failures of a request once it has succeeded.
+
+    Args:
+        key (str): The request's cache key (see make_request_key)
+    """
+    with _lock:
+        _failures.pop(key, None)
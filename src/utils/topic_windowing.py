@@ -0,0 +1,152 @@
+"""
+Utility to select the parts of a transcript that are relevant to each topic.
+
+This module splits the transcript into segments once and scores them against
+each topic by keyword overlap, so that transformation prompts only include the
+transcript window related to the topic being processed.
+"""
+
+import re
+from typing import Dict, List
+from src.utils.apply_rubric import TRANSCRIPT_EXCERPT_TOKENS, TRANSCRIPT_GAP_MARKER, TOKENIZER_MODEL, get_transcript_excerpt
+from src.utils.call_llm import count_tokens
+from src.utils.logger import logger
+
+# Segments longer than this (transcripts without punctuation) are split into word chunks
+MAX_SEGMENT_CHARS = 400
+SEGMENT_WORDS = 50
+
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+")
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Common words that carry no topic signal
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "why", "with"
+})
+
+def split_transcript_segments(transcript: str) -> List[str]:
+    """
+    Split a transcript into sentence-sized segments.
+    
+    Args:
+        transcript (str): The video transcript
+    
+    Returns:
+        List[str]: Transcript segments in their original order
+    """
+    segments = []
+    for sentence in SENTENCE_SPLIT_PATTERN.split(transcript.strip()):
+        if len(sentence) <= MAX_SEGMENT_CHARS:
+            if sentence:
+                segments.append(sentence)
+            continue
+        # Fall back to fixed-size word chunks for unpunctuated transcripts
+        words = sentence.split()
+        for i in range(0, len(words), SEGMENT_WORDS):
+            segments.append(" ".join(words[i:i + SEGMENT_WORDS]))
+    return segments
+
+def get_keywords(text: str) -> set:
+    """
+    Extract the lowercase keywords from a piece of text.
+    
+    Args:
+        text (str): The text to extract keywords from
+    
+    Returns:
+        set: Keywords with stopwords and very short words removed
+    """
+    return {word for word in WORD_PATTERN.findall(text.lower()) if len(word) > 2 and word not in STOPWORDS}
+
+def build_topic_windows(transcript: str, topics: List[str], top_k: int = 8, context: int = 2,
+                        max_tokens: int = TRANSCRIPT_EXCERPT_TOKENS, excerpt: str = None) -> Dict[str, str]:
+    """
+    Build the relevant transcript window for each topic.
+    
+    The transcript is segmented and tokenized once; each topic then picks its
+    top_k best-matching segments plus `context` neighbouring segments on either
+    side, emitted in transcript order and capped at max_tokens. The budget is the
+    same one get_transcript_excerpt uses, so a window never needs truncating again.
+    Skipped stretches of the transcript are marked with TRANSCRIPT_GAP_MARKER.
+    
+    Args:
+        transcript (str): The video transcript
+        topics (List[str]): The topics to build windows for
+        top_k (int): Number of best-matching segments to select per topic
+        context (int): Number of neighbouring segments to include around each match
+        max_tokens (int): Maximum size of each window in tokens
+        excerpt (str, optional): The shared transcript excerpt (see get_transcript_excerpt),
+            used for topics that match no segment; computed once here if not given
+    
+    Returns:
+        Dict[str, str]: Dictionary mapping each topic to its transcript window
+    """
+    segments = split_transcript_segments(transcript)
+    segment_keywords = [get_keywords(segment) for segment in segments]
+    segment_tokens = [count_tokens(segment, TOKENIZER_MODEL) for segment in segments]
+    windows = {}
+    
+    for topic in topics:
+        topic_keywords = get_keywords(topic)
+        scores = [len(topic_keywords & keywords) for keywords in segment_keywords]
+        ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i])[:top_k]
+        
+        if not ranked:
+            # No keyword overlap; fall back to the leading transcript excerpt
+            logger.debug(f"No transcript segments matched topic: {topic}")
+            if excerpt is None:
+                excerpt = get_transcript_excerpt(transcript)
+            windows[topic] = excerpt
+            continue
+        
+        # Add context around the best matches in rank order until the size budget is used
+        selected = set()
+        size = 0
+        for i in ranked:
+            neighbours = range(max(0, i - context), min(len(segments), i + context + 1))
+            for j in [i] + [n for n in neighbours if n != i]:
+                # One extra token per segment for the newline joining it to the next
+                if j not in selected and size + segment_tokens[j] <= max_tokens:
+                    selected.add(j)
+                    size += segment_tokens[j] + 1
+        
+        windows[topic] = join_segments(segments, sorted(selected))
+        logger.debug(f"Built {size}-token transcript window for topic: {topic}")
+    
+    return windows
+
+def join_segments(segments: List[str], indices: List[int]) -> str:
+    """
+    Join selected segments in order, marking the segments left out between and around them.
+    
+    Args:
+        segments (List[str]): All transcript segments
+        indices (List[int]): Indices of the selected segments, in ascending order
+    
+    Returns:
+        str: The selected segments, one per line, with TRANSCRIPT_GAP_MARKER lines at the gaps
+    """
+    lines = []
+    previous = -1
+    for j in indices:
+        if j != previous + 1:
+            lines.append(TRANSCRIPT_GAP_MARKER)
+        lines.append(segments[j])
+        previous = j
+    if previous != len(segments) - 1:
+        lines.append(TRANSCRIPT_GAP_MARKER)
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    # Simple test case
+    test_transcript = """
+    Machine learning is a subset of artificial intelligence that focuses on building systems that learn from data.
+    Supervised learning trains a model on labeled data. Unsupervised learning finds patterns in unlabeled data.
+    Deep learning uses neural networks with many layers. Convolutional neural networks are excellent at image recognition.
+    """
+    
+    test_topics = ["Neural Networks", "Supervised Learning"]
+    
+    for topic, window in build_topic_windows(test_transcript, test_topics).items():
+        print(f"\n{topic}:\n{window}")
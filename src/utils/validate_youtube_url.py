@@ -4,6 +4,13 @@ Utility function to validate YouTube URLs and extract video IDs.
 import re
 from urllib.parse import urlparse, parse_qs
 
+# Regular expression pattern for different YouTube URL formats, compiled once at import
+YOUTUBE_URL_PATTERN = re.compile(
+    r'(https?://)?(www\.)?'
+    r'(youtube|youtu|youtube-nocookie)\.(com|be)/'
+    r'(watch\?v=|embed/|v/|.+\?v=)?([^&=%\?]{11})'
+)
+
 def validate_youtube_url(url):
     """
     Validates if the given URL is a valid YouTube video URL and extracts the video ID.
@@ -17,14 +24,7 @@ def validate_youtube_url(url):
     if not url:
         return False, ""
     
-    # Regular expression patterns for different YouTube URL formats
-    youtube_regex = (
-        r'(https?://)?(www\.)?'
-        r'(youtube|youtu|youtube-nocookie)\.(com|be)/'
-        r'(watch\?v=|embed/|v/|.+\?v=)?([^&=%\?]{11})'
-    )
-    
-    youtube_match = re.match(youtube_regex, url)
+    youtube_match = YOUTUBE_URL_PATTERN.match(url)
     
     if youtube_match:
         video_id = youtube_match.group(6)
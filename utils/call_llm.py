@@ -1,14 +1,18 @@
-from openai import OpenAI
-
+# The LLM helpers live in src/utils/call_llm.py; this module re-exports them so the
+# example flow shares the same client, caching and retry handling as the pipeline.
 # Learn more about calling the LLM: https://the-pocket.github.io/PocketFlow/utility_function/llm.html
-def call_llm(prompt):    
-    client = OpenAI(api_key="YOUR_API_KEY_HERE")
-    r = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return r.choices[0].message.content
-    
+import sys
+from pathlib import Path
+
+# Add the project root to the path so this module also runs as a script
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[1])
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
+
+from src.utils.call_llm import call_llm, call_llm_structured
+
+__all__ = ["call_llm", "call_llm_structured"]
+
 if __name__ == "__main__":
     prompt = "What is the meaning of life?"
     print(call_llm(prompt))